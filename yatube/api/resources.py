@@ -0,0 +1,125 @@
+"""Описание ресурсов API: какие поля можно запросить и во что
+превращается строка ``.values()`` в ответе.
+
+``fields=`` выбирает поля ресурса, ``include=`` заменяет id автора или
+группы вложенным объектом. Вложенные объекты выбираются JOIN в том же
+запросе, модели не создаются.
+"""
+from posts.models import Post
+
+AUTHOR_FIELDS = ('id', 'username', 'first_name', 'last_name')
+GROUP_FIELDS = ('id', 'slug', 'title')
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _split(value):
+    return [item for item in (value or '').split(',') if item]
+
+
+def _related(relation, fields):
+    return {field: f'{relation}__{field}' for field in fields}
+
+
+def image_url(name):
+    return Post._meta.get_field('image').storage.url(name) if name else None
+
+
+class Resource:
+    def __init__(self, fields, relations=None, converters=None):
+        self.fields = fields
+        self.relations = relations or {}
+        self.converters = converters or {}
+
+    def parse(self, params):
+        """Поля ответа и вложенные объекты из ``fields=`` и ``include=``."""
+        fields = _split(params.get('fields')) or list(self.fields)
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        includes = _split(params.get('include'))
+        unknown = set(includes) - set(self.relations)
+        if unknown:
+            raise ApiError(
+                f'Нельзя включить: {", ".join(sorted(unknown))}')
+        fields += [name for name in includes if name not in fields]
+        return fields, set(includes)
+
+    def lookups(self, fields, includes):
+        lookups = []
+        for name in fields:
+            if name in includes:
+                lookups.extend(self.relations[name].values())
+            else:
+                lookups.append(self.fields[name])
+        return lookups
+
+    def serialize(self, row, fields, includes):
+        data = {}
+        for name in fields:
+            if name in includes:
+                related = {
+                    field: row[lookup]
+                    for field, lookup in self.relations[name].items()
+                }
+                data[name] = related if related['id'] is not None else None
+                continue
+            value = row[self.fields[name]]
+            convert = self.converters.get(name)
+            data[name] = convert(value) if convert else value
+        return data
+
+
+POSTS = Resource(
+    {
+        'id': 'id',
+        'text': 'text',
+        'created': 'created',
+        'updated': 'updated',
+        'author': 'author_id',
+        'group': 'group_id',
+        'image': 'image',
+    },
+    relations={
+        'author': _related('author', AUTHOR_FIELDS),
+        'group': _related('group', GROUP_FIELDS),
+    },
+    converters={'image': image_url},
+)
+COMMENTS = Resource(
+    {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author_id',
+        'text': 'text',
+        'created': 'created',
+    },
+    relations={'author': _related('author', AUTHOR_FIELDS)},
+)
+GROUPS = Resource({
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+})
+PROFILES = Resource(
+    {
+        'id': 'id',
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'posts_count': 'stats__posts_count',
+        'followers_count': 'stats__followers_count',
+        'following_count': 'stats__following_count',
+    },
+    # Счётчики появляются после первого пересчёта (posts.counters).
+    converters={
+        name: lambda value: value or 0
+        for name in ('posts_count', 'followers_count', 'following_count')
+    },
+)
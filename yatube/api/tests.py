@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.paginator import NEXT, encode_cursor
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_json(self, url, status=HTTPStatus.OK, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_cursor_pagination(self):
+        """Список постов листается по курсору до конца."""
+        url = reverse('api:post_list')
+        data = self.get_json(url, limit=2, fields='text')
+        self.assertEqual(data['results'],
+                         [{'text': 'Пост 2'}, {'text': 'Пост 1'}])
+        self.assertIsNone(data['previous'])
+        data = self.get_json(data['next'])
+        self.assertEqual(data['results'], [{'text': 'Пост 0'}])
+        self.assertIsNone(data['next'])
+
+    def test_forged_cursor_rejected(self):
+        """Испорченный или подделанный курсор — 400 с описанием."""
+        url = reverse('api:post_list')
+        for cursor in ('garbage', encode_cursor(NEXT, ['not a date', 1]),
+                       encode_cursor(NEXT, [1])):
+            with self.subTest(cursor=cursor):
+                data = self.get_json(url, HTTPStatus.BAD_REQUEST,
+                                     cursor=cursor)
+                self.assertEqual(data, {'detail': 'Неверный курсор'})
+
+    def test_sparse_fieldsets_and_include_in_one_query(self):
+        """fields= и include= выбираются одним запросом без создания
+        моделей."""
+        url = reverse('api:post_detail', args=(self.posts[0].pk,))
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            data = self.get_json(url, fields='id,author',
+                                 include='author,group')
+        self.assertEqual(data, {
+            'id': self.posts[0].pk,
+            'author': {'id': self.author.pk, 'username': 'auth',
+                       'first_name': 'Лев', 'last_name': 'Толстой'},
+            'group': {'id': self.group.pk, 'slug': 'group',
+                      'title': 'Группа'},
+        })
+
+    def test_invalid_parameters(self):
+        """Неизвестные поля и включения — 400, отсутствующий объект —
+        404, запись — 405."""
+        url = reverse('api:post_list')
+        self.get_json(url, HTTPStatus.BAD_REQUEST, fields='password')
+        self.get_json(url, HTTPStatus.BAD_REQUEST, include='comments')
+        self.get_json(reverse('api:group_detail', args=('nope',)),
+                      HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.client.post(url).status_code,
+                         HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def test_groups_profiles_and_comments(self):
+        """Группы, профили и комментарии доступны в API."""
+        groups = self.get_json(reverse('api:group_list'))['results']
+        self.assertEqual([group['slug'] for group in groups], ['group'])
+        profile = self.get_json(
+            reverse('api:profile_detail', args=('auth',)))
+        self.assertEqual(profile['username'], 'auth')
+        self.assertEqual(profile['posts_count'], 3)
+        comments = self.get_json(
+            reverse('api:comment_list', args=(self.posts[0].pk,)),
+            include='author')['results']
+        self.assertEqual(comments[0]['author']['username'], 'reader')
+        filtered = self.get_json(reverse('api:post_list'), author='reader')
+        self.assertEqual(filtered['results'], [])
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованному
+        пользователю."""
+        url = reverse('api:follow_feed')
+        self.get_json(url, HTTPStatus.UNAUTHORIZED)
+        self.client.force_login(self.reader)
+        data = self.get_json(url, fields='id')
+        self.assertEqual(len(data['results']), 3)
@@ -0,0 +1,127 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.budget import query_budget
+from core.paginator import InvalidCursor, ValuesCursorPaginator
+from posts import timeline
+from posts.models import Comment, Group, Post
+
+from .constants import MAX_PAGE_SIZE, PAGE_SIZE
+from .resources import COMMENTS, GROUPS, POSTS, PROFILES, ApiError
+
+User = get_user_model()
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(view):
+    """Только GET; ApiError превращается в JSON-ответ с её статусом."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response({'detail': error.detail}, error.status)
+    return wrapper
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def paginated(request, resource, queryset, ordering=None):
+    fields, includes = resource.parse(request.GET)
+    paginator = ValuesCursorPaginator(
+        queryset, page_size(request), resource.lookups(fields, includes),
+        ordering=ordering,
+    )
+    try:
+        page = paginator.page(cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        raise ApiError('Неверный курсор')
+    return json_response({
+        'results': [resource.serialize(row, fields, includes)
+                    for row in page.object_list],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def single(request, resource, queryset):
+    fields, includes = resource.parse(request.GET)
+    row = queryset.values(*resource.lookups(fields, includes)).first()
+    if row is None:
+        raise ApiError('Не найдено', status=404)
+    return json_response(resource.serialize(row, fields, includes))
+
+
+@query_budget(4)
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return paginated(request, POSTS, posts)
+
+
+@query_budget(3)
+@api_view
+def post_detail(request, post_id):
+    return single(request, POSTS, Post.objects.filter(pk=post_id))
+
+
+@query_budget(4)
+@api_view
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise ApiError('Не найдено', status=404)
+    return paginated(request, COMMENTS, Comment.objects.filter(
+        post_id=post_id).order_by('created', 'pk'))
+
+
+@query_budget(3)
+@api_view
+def group_list(request):
+    return paginated(request, GROUPS, Group.objects.order_by('pk'))
+
+
+@query_budget(3)
+@api_view
+def group_detail(request, slug):
+    return single(request, GROUPS, Group.objects.filter(slug=slug))
+
+
+@query_budget(3)
+@api_view
+def profile_detail(request, username):
+    return single(request, PROFILES, User.objects.filter(username=username))
+
+
+@query_budget(5)
+@api_view
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Требуется авторизация', status=401)
+    return paginated(request, POSTS, timeline.timeline_posts(request.user),
+                     ordering=timeline.ORDERING)
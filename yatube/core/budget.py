@@ -0,0 +1,72 @@
+"""Бюджет запросов к БД для представлений и участков кода.
+
+``@query_budget(n)`` (или ``with query_budget(n):``) считает запросы
+внутри и, если их больше ``n``, пишет предупреждение в лог, а при
+QUERY_BUDGET_RAISE = True (в тестах) бросает QueryBudgetExceeded.
+Так N+1 в шаблоне обнаруживается тестами, а не на рабочих данных.
+"""
+import logging
+import re
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Управление транзакциями не считается: внутри TestCase atomic()
+# выполняет SAVEPOINT вместо BEGIN, и бюджеты не совпадали бы.
+TRANSACTION_CONTROL = re.compile(
+    r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+
+    def __init__(self, limit, name=None):
+        self.limit = limit
+        self.name = name
+        self.queries = []
+
+    def __call__(self, func):
+        if self.name is None:
+            self.name = f'{func.__module__}.{func.__qualname__}'
+        wrapper = super().__call__(func)
+        wrapper.query_budget = self.limit
+        return wrapper
+
+    def _recreate_cm(self):
+        # Каждый вызов декорированной функции считает запросы отдельно.
+        return type(self)(self.limit, self.name)
+
+    def _count(self, execute, sql, params, many, context):
+        if not TRANSACTION_CONTROL.match(sql):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrappers = [
+            connection.execute_wrapper(self._count)
+            for connection in connections.all()
+        ]
+        for wrapper in self._wrappers:
+            wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        for wrapper in reversed(self._wrappers):
+            wrapper.__exit__(exc_type, exc, traceback)
+        if exc_type is not None or len(self.queries) <= self.limit:
+            return False
+        message = (
+            f'{self.name or "Блок"}: {len(self.queries)} запросов к БД при '
+            f'бюджете {self.limit}:\n' + '\n'.join(self.queries)
+        )
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return False
@@ -0,0 +1,266 @@
+"""Кеширование страниц с инвалидацией по событиям.
+
+Каждой области кеша (например, «все посты» или «профиль автора»)
+соответствует счётчик поколения. Закешированная страница хранит
+поколения, при которых она построена, поэтому изменение данных,
+увеличивающее счётчик, сразу делает её устаревшей, а TTL можно держать
+большим.
+
+Устаревшую или истёкшую страницу пересчитывает один запрос
+(блокировка через cache.add), остальные в это время получают прежнюю
+версию (stale-while-revalidate). Незадолго до истечения страница
+с растущей вероятностью пересчитывается заранее (probabilistic early
+expiration), чтобы истечение не совпадало у многих запросов.
+
+Вместе с поколением хранится время последнего изменения области.
+Из них строятся ETag и Last-Modified, и повторный запрос с совпавшим
+валидатором получает 304 без выполнения представления.
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+
+from . import routers
+
+GENERATION_KEY = 'generation:{}'
+MODIFIED_KEY = 'modified:{}'
+PAGE_KEY = 'page:{}:{}'
+LOCK_KEY = '{}:lock'
+
+# Сколько после истечения можно отдавать прежнюю версию, пока её
+# пересчитывает другой запрос.
+STALE_TIMEOUT = 60
+# Сколько держится блокировка пересчёта и сколько её ждёт запрос,
+# которому нечего отдать.
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+# Коэффициент раннего пересчёта; 0 — пересчитывать только по истечении.
+EARLY_EXPIRY_BETA = 1.0
+
+
+def _scope_hash(scope):
+    # Имена областей содержат слаги и имена пользователей, поэтому в ключ
+    # попадает их хеш: так ключ допустим для любого бэкенда кеша.
+    return hashlib.md5(scope.encode()).hexdigest()
+
+
+def _generation_key(scope):
+    return GENERATION_KEY.format(_scope_hash(scope))
+
+
+def _modified_key(scope):
+    return MODIFIED_KEY.format(_scope_hash(scope))
+
+
+def _initial_generation():
+    # Счётчик, вытесненный из кеша, создаётся заново от текущего времени,
+    # чтобы не совпасть с поколением уже закешированных страниц.
+    return int(time.time() * 1000)
+
+
+def state(*scopes):
+    """Поколения областей кеша в порядке аргументов и время последнего
+    изменения любой из них (Unix time) — одним обращением к кешу."""
+    generation_keys = [_generation_key(scope) for scope in scopes]
+    modified_keys = [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(generation_keys + modified_keys)
+    for key in generation_keys:
+        if key not in found:
+            cache.add(key, _initial_generation(), timeout=None)
+            found[key] = cache.get(key)
+    for key in modified_keys:
+        # Неизвестное время изменения считаем текущим: лишний 200 лучше,
+        # чем 304 для изменившейся страницы.
+        if key not in found:
+            cache.add(key, time.time(), timeout=None)
+            found[key] = cache.get(key)
+    return (
+        [found[key] for key in generation_keys],
+        max(found[key] or time.time() for key in modified_keys),
+    )
+
+
+def generations(*scopes):
+    """Текущие поколения областей кеша в порядке аргументов."""
+    return state(*scopes)[0]
+
+
+def bump(*scopes):
+    """Увеличивает поколения областей кеша, инвалидируя их страницы."""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), timeout=None)
+    now = time.time()
+    cache.set_many(
+        {_modified_key(scope): now for scope in scopes}, timeout=None
+    )
+
+
+def bump_on_commit(*scopes):
+    """bump сейчас и ещё раз после коммита: страница, которую
+    параллельный запрос пересчитал до коммита, построена по старым
+    данным и не должна пережить его."""
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def validators(request, view_name, versions, modified):
+    """ETag и Last-Modified страницы. Страница зависит от пользователя,
+    поэтому его id входит в ETag."""
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    digest = hashlib.md5('{}:{}:{}'.format(
+        view_name, '.'.join(map(str, versions)), user_id
+    ).encode()).hexdigest()
+    return f'"{digest}"', int(modified)
+
+
+def _is_fresh(entry, version, beta):
+    """XFetch: чем дольше пересчёт (delta) и ближе истечение, тем
+    вероятнее, что значение будет считаться истёкшим уже сейчас."""
+    if entry is None or entry['version'] != version:
+        return False
+    early = -entry['delta'] * beta * math.log(1 - random.random())
+    return time.time() + early < entry['expires']
+
+
+def _store(key, value, version, timeout, stale_timeout, delta):
+    cache.set(key, {
+        'value': value,
+        'version': version,
+        'expires': time.time() + timeout,
+        'delta': delta,
+    }, timeout + stale_timeout)
+
+
+def _get_or_compute(key, compute, timeout, version, stale_timeout,
+                    lock_timeout, beta, cacheable):
+    """get_or_compute, возвращающий ещё и поколение, при котором
+    построено значение: прежнее значение может быть старее ``version``."""
+    entry = cache.get(key)
+    if _is_fresh(entry, version, beta):
+        return entry['value'], version
+    lock = LOCK_KEY.format(key)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + lock_timeout
+    while not cache.add(lock, token, lock_timeout):
+        if entry is not None and time.time() < (
+                entry['expires'] + stale_timeout):
+            return entry['value'], entry['version']
+        if time.monotonic() >= deadline:
+            # Держатель блокировки не успел: считаем сами, без неё.
+            return compute(), version
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry['value'], version
+    try:
+        # Блокировку могли отпустить сразу после того, как прежний
+        # держатель сохранил новое значение: пересчитывать его не нужно.
+        current = cache.get(key)
+        if (current is not None and current['version'] == version
+                and time.time() < current['expires']
+                and current['expires'] != (entry or {}).get('expires')):
+            return current['value'], version
+        started = time.monotonic()
+        value = compute()
+        if cacheable(value):
+            _store(key, value, version, timeout, stale_timeout,
+                   time.monotonic() - started)
+        return value, version
+    finally:
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+
+def get_or_compute(key, compute, timeout, version=None,
+                   stale_timeout=STALE_TIMEOUT, lock_timeout=LOCK_TIMEOUT,
+                   beta=EARLY_EXPIRY_BETA, cacheable=lambda value: True):
+    """Значение из кеша или ``compute()``, защищённое от лавины пересчётов.
+
+    Значение с другим ``version`` считается устаревшим. Пересчитывает
+    его только запрос, получивший блокировку; остальные отдают прежнее
+    значение, если оно истекло не больше ``stale_timeout`` секунд назад,
+    а если отдать нечего — ждут результата до ``lock_timeout`` секунд.
+    """
+    return _get_or_compute(key, compute, timeout, version, stale_timeout,
+                           lock_timeout, beta, cacheable)[0]
+
+
+def viewer_key(request):
+    """Пользователь и CSRF-cookie, токен из которой попадает в формы
+    на странице: у разных посетителей страницы разные."""
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.md5(f'{user_id}:{csrf}'.encode()).hexdigest()
+
+
+def page_key(request, view_name):
+    """Ключ страницы: адрес и ``viewer_key`` посетителя."""
+    digest = hashlib.md5('{}:{}'.format(
+        request.build_absolute_uri(), viewer_key(request)
+    ).encode()).hexdigest()
+    return PAGE_KEY.format(view_name, digest)
+
+
+def versioned_cache_page(timeout, scopes, stale_timeout=STALE_TIMEOUT,
+                         lock_timeout=LOCK_TIMEOUT, beta=EARLY_EXPIRY_BETA):
+    """Кеширует ответы GET и HEAD, пока не изменятся поколения областей,
+    возвращаемых ``scopes(request, *args, **kwargs)``, и не истечёт
+    ``timeout``. Параметры защиты от лавины пересчётов — как
+    у ``get_or_compute``.
+
+    Страница, которая попадёт в кеш, строится по основной базе: реплика
+    может отставать от поколений, под которыми её сохранят.
+
+    Если If-None-Match или If-Modified-Since совпадают с текущими
+    поколениями и временем изменения областей, ответ — 304. Прежняя
+    версия страницы, отданная на время пересчёта, уходит без ETag и
+    Last-Modified.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            def render():
+                with routers.primary():
+                    return view(request, *args, **kwargs)
+
+            versions, modified = state(*scopes(request, *args, **kwargs))
+            etag, last_modified = validators(
+                request, view.__name__, versions, modified)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            built_for = versions
+            if response is None:
+                response, built_for = _get_or_compute(
+                    page_key(request, view.__name__), render,
+                    timeout, versions, stale_timeout, lock_timeout, beta,
+                    cacheable=lambda response: response.status_code == 200,
+                )
+            if response.status_code in (200, 304):
+                # У прежней версии страницы, отданной на время пересчёта,
+                # валидаторов нет: иначе клиент подтверждал бы её 304
+                # до следующего изменения.
+                if built_for == versions:
+                    response['ETag'] = etag
+                    response['Last-Modified'] = http_date(last_modified)
+                patch_cache_control(response, no_cache=True)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,468 @@
+"""Бэкенды кеша, считающие попадания и промахи текущего запроса,
+и двухуровневый кеш: память процесса перед общим файлом SQLite."""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_MISSING = object()
+
+
+def _dumps(value):
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+class InstrumentedCacheMixin:
+    _in_get_many = False
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if not self._in_get_many:
+            metrics.record_cache(value is not _MISSING, value is _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # Базовый get_many вызывает get для каждого ключа: учитываем их
+        # здесь один раз.
+        self._in_get_many = True
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            self._in_get_many = False
+        metrics.record_cache(len(found), len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов на машине.
+
+    Каждое изменение ключа (set, add, delete, incr, touch, clear и
+    вытеснение при переполнении) записывается в журнал invalidations
+    с возрастающим id — по нему ``TieredCache`` узнаёт, какие локальные
+    копии устарели.
+    """
+    # Записи журнала старше этого срока удаляются; процесс, который не
+    # сверялся с журналом дольше, сбрасывает свой локальный уровень.
+    INVALIDATION_TTL = 60
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, '
+                'value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS invalidations (id INTEGER '
+                'PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, '
+                'origin INTEGER NOT NULL, created REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    # Источник записей журнала о вытеснении: у процесса, вытеснившего
+    # ключ, в памяти тоже может быть его копия.
+    CULL_ORIGIN = 0
+
+    def _invalidate(self, connection, key):
+        connection.execute(
+            'INSERT INTO invalidations (key, origin, created) '
+            'VALUES (?, ?, ?)', (key, os.getpid(), time.time())
+        )
+
+    def _maybe_cull(self, connection):
+        if random.randrange(100):
+            return
+        now = time.time()
+        connection.execute(
+            'DELETE FROM invalidations WHERE created < ?',
+            (now - self.INVALIDATION_TTL,)
+        )
+        # Локальные копии живут не дольше записи, поэтому удаление
+        # истёкших записей в журнал не попадает.
+        connection.execute('DELETE FROM cache WHERE expires < ?', (now,))
+        count, = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            culled = [key for key, in connection.execute(
+                'SELECT key FROM cache ORDER BY expires IS NULL, expires '
+                'LIMIT ?', (count // self._cull_frequency,)
+            )]
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?', [(key,) for key in culled])
+            connection.executemany(
+                'INSERT INTO invalidations (key, origin, created) '
+                'VALUES (?, ?, ?)',
+                [(key, self.CULL_ORIGIN, now) for key in culled]
+            )
+
+    # Методы с подчёркиванием принимают уже построенные make_key ключи,
+    # ими пользуется TieredCache.
+
+    def _get_entries(self, keys):
+        """{ключ: (pickle значения, срок)} для найденных и не истёкших
+        ключей."""
+        now = time.time()
+        rows = self._connection().execute(
+            'SELECT key, value, expires FROM cache WHERE key IN ({})'.format(
+                ', '.join('?' * len(keys))), keys
+        ).fetchall() if keys else []
+        return {
+            key: (data, expires)
+            for key, data, expires in rows
+            if expires is None or expires > now
+        }
+
+    def _set(self, key, data, expires):
+        with self._write() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', (key, data, expires)
+            )
+            self._invalidate(connection, key)
+            self._maybe_cull(connection)
+
+    def _add(self, key, data, expires):
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time())
+            )
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', (key, data, expires)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._invalidate(connection, key)
+            self._maybe_cull(connection)
+            return True
+
+    def _delete(self, key):
+        with self._write() as connection:
+            cursor = connection.execute(
+                'DELETE FROM cache WHERE key = ?', (key,))
+            if cursor.rowcount:
+                self._invalidate(connection, key)
+            return bool(cursor.rowcount)
+
+    def _touch(self, key, expires):
+        with self._write() as connection:
+            cursor = connection.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (expires, key, time.time())
+            )
+            if cursor.rowcount:
+                self._invalidate(connection, key)
+            return bool(cursor.rowcount)
+
+    def _incr(self, key, delta):
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (_dumps(value), key)
+            )
+            self._invalidate(connection, key)
+        return value, row[1]
+
+    def invalidations(self, after):
+        """id последней записи журнала и ключи, изменённые другими
+        процессами после ``after``; ``'*'`` означает очистку всего кеша."""
+        rows = self._connection().execute(
+            'SELECT id, key, origin FROM invalidations WHERE id > ? '
+            'ORDER BY id', (after,)
+        ).fetchall()
+        if not rows:
+            return after, []
+        pid = os.getpid()
+        return rows[-1][0], [key for _, key, origin in rows if origin != pid]
+
+    def last_invalidation(self):
+        row = self._connection().execute(
+            'SELECT MAX(id) FROM invalidations').fetchone()
+        return row[0] or 0
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        entry = self._get_entries([key]).get(key)
+        return default if entry is None else pickle.loads(entry[0])
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        return {
+            made[key]: pickle.loads(data)
+            for key, (data, _) in self._get_entries(list(made)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set(self._key(key, version), _dumps(value),
+                  self.get_backend_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._add(self._key(key, version), _dumps(value),
+                         self.get_backend_timeout(timeout))
+
+    def delete(self, key, version=None):
+        return self._delete(self._key(key, version))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._touch(self._key(key, version),
+                           self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        return self._incr(self._key(key, version), delta)[0]
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return key in self._get_entries([key])
+
+    def clear(self):
+        with self._write() as connection:
+            connection.execute('DELETE FROM cache')
+            self._invalidate(connection, '*')
+
+
+class _LocalTier:
+    """Локальный уровень: общий для всех потоков процесса LRU-словарь
+    {ключ: (pickle значения, срок)} и счётчики попаданий. Значения
+    хранятся сериализованными, как в LocMemCache: каждый get получает
+    свою копию, и изменения объекта не видны другим запросам.
+
+    ``writes`` растёт при каждой записи процесса: чтение, во время
+    которого что-то записали, не кладёт прочитанное в память, потому
+    что оно могло уже устареть."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.last_invalidation = None
+        self.synced = 0
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+
+_local_tiers = {}
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кеш: небольшой LRU в памяти процесса перед общим
+    для процессов ``SQLiteCache``.
+
+    Перед чтением локальный уровень сверяется с журналом изменений
+    общего уровня (не чаще раза в SYNC_INTERVAL секунд) и выбрасывает
+    ключи, изменённые другими процессами. Записи идут в общий уровень,
+    а локальная копия ключа при этом выбрасывается: если записать её
+    обратно, два потока одного процесса могли бы оставить в памяти
+    старшее значение вместо нового (журнал не сообщает процессу о его
+    собственных записях).
+
+    OPTIONS: LOCAL_MAX_ENTRIES — размер локального уровня (300),
+    LOCAL_TIMEOUT — наибольший срок жизни локальной копии (300 с),
+    SYNC_INTERVAL (0 — сверяться при каждом чтении). Изменение, сделанное
+    другим процессом, становится видно в памяти процесса не позже чем
+    через SYNC_INTERVAL секунд: столько же может отдаваться прежнее
+    поколение области кеша (core.cache) и построенная по нему страница.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared = SQLiteCache(location, params)
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 300))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 300))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 0))
+        self._tier = _local_tiers.setdefault(location, _LocalTier())
+        with self._tier.lock:
+            if self._tier.last_invalidation is None:
+                self._tier.last_invalidation = self.shared.last_invalidation()
+                self._tier.synced = time.monotonic()
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _sync(self):
+        tier = self._tier
+        now = time.monotonic()
+        if now - tier.synced < self._sync_interval:
+            return
+        if now - tier.synced > self.shared.INVALIDATION_TTL / 2:
+            # Журнал мог быть уже очищен: доверять локальным копиям нельзя.
+            last, keys = self.shared.last_invalidation(), ['*']
+        else:
+            last, keys = self.shared.invalidations(tier.last_invalidation)
+        with tier.lock:
+            if '*' in keys:
+                tier.entries.clear()
+            else:
+                for key in keys:
+                    tier.entries.pop(key, None)
+            tier.last_invalidation = last
+            tier.synced = now
+
+    def _remember(self, entries, writes):
+        """Кладёт прочитанные из общего уровня значения в память, если
+        с начала чтения (``writes``) процесс ничего не записал."""
+        now = time.time()
+        tier = self._tier
+        with tier.lock:
+            if tier.writes != writes:
+                return
+            for key, (data, expires) in entries.items():
+                local_expires = now + self._local_timeout
+                if expires is not None:
+                    local_expires = min(local_expires, expires)
+                tier.entries[key] = (data, local_expires)
+                tier.entries.move_to_end(key)
+            while len(tier.entries) > self._local_max_entries:
+                tier.entries.popitem(last=False)
+
+    def _forget(self, key):
+        with self._tier.lock:
+            self._tier.entries.pop(key, None)
+            self._tier.writes += 1
+
+    def _lookup(self, keys):
+        """{ключ: значение} с обоих уровней; недостающее в памяти
+        читается из общего уровня одним запросом."""
+        self._sync()
+        tier = self._tier
+        now = time.time()
+        found = {}
+        with tier.lock:
+            writes = tier.writes
+            for key in keys:
+                entry = tier.entries.get(key)
+                if entry is not None and entry[1] > now:
+                    tier.entries.move_to_end(key)
+                    found[key] = entry[0]
+        missing = [key for key in keys if key not in found]
+        shared = self.shared._get_entries(missing)
+        self._remember(shared, writes)
+        for key, (data, _) in shared.items():
+            found[key] = data
+        local_hits = len(found) - len(shared)
+        with tier.lock:
+            tier.stats['local_hits'] += local_hits
+            tier.stats['shared_hits'] += len(shared)
+            tier.stats['misses'] += len(keys) - len(found)
+        metrics.record_cache_tiers(local_hits, len(shared))
+        return {key: pickle.loads(data) for key, data in found.items()}
+
+    def hit_ratios(self):
+        """Доли попаданий уровней с запуска процесса: локального — от
+        всех чтений, общего — от дошедших до него."""
+        stats = dict(self._tier.stats)
+        total = sum(stats.values())
+        shared_total = stats['shared_hits'] + stats['misses']
+        return {
+            **stats,
+            'local_ratio': stats['local_hits'] / total if total else 0,
+            'shared_ratio': (stats['shared_hits'] / shared_total
+                             if shared_total else 0),
+        }
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._lookup([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        return {
+            made[key]: value for key, value in self._lookup(list(made)).items()
+        }
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return key in self._lookup([key])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        self.shared._set(key, _dumps(value), expires)
+        self._forget(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        added = self.shared._add(key, _dumps(value), expires)
+        if added:
+            self._forget(key)
+        return added
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        deleted = self.shared._delete(key)
+        self._forget(key)
+        return deleted
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        touched = self.shared._touch(key, self.get_backend_timeout(timeout))
+        self._forget(key)
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        value, _ = self.shared._incr(key, delta)
+        self._forget(key)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        with self._tier.lock:
+            self._tier.entries.clear()
+            self._tier.writes += 1
+
+
+class InstrumentedTieredCache(InstrumentedCacheMixin, TieredCache):
+    pass
@@ -0,0 +1,22 @@
+"""Настройка соединений с SQLite.
+
+PRAGMA из ``settings.SQLITE_PRAGMAS`` выполняются при открытии каждого
+соединения напрямую через драйвер sqlite3, поэтому не попадают в
+счётчики запросов и бюджеты.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def configure(raw_connection, pragmas):
+    """Выполняет PRAGMA на соединении драйвера sqlite3."""
+    for name, value in pragmas.items():
+        raw_connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created, dispatch_uid='core.db.apply_pragmas')
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        configure(connection.connection,
+                  getattr(settings, 'SQLITE_PRAGMAS', {}))
@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import configure
+
+# Параметры по умолчанию для sqlite3 в Django: журнал отката,
+# synchronous=FULL, новое соединение на каждый запрос.
+PROFILES = {
+    'default': {'pragmas': {}, 'reuse': False},
+    'production': {'pragmas': None, 'reuse': True},
+}
+READ = ('SELECT id, text FROM post WHERE author = ? '
+        'ORDER BY id DESC LIMIT 10')
+WRITE = 'INSERT INTO post (author, text) VALUES (?, ?)'
+AUTHORS = 100
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=5)
+    configure(connection, pragmas)
+    return connection
+
+
+def prepare(path, rows, pragmas):
+    with connect(path, pragmas) as connection:
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, '
+            'author INTEGER NOT NULL, text TEXT NOT NULL)'
+        )
+        connection.execute('CREATE INDEX post_author ON post (author, id)')
+        connection.executemany(WRITE, (
+            (number % AUTHORS, 'текст поста ' * 20) for number in range(rows)
+        ))
+    connection.close()
+
+
+def run(role, path, profile, deadline, results):
+    """Выполняет чтения или записи до ``deadline``, считает успешные
+    операции и ошибки блокировки."""
+    done = errors = 0
+    connection = None
+    number = os.getpid()
+    while time.monotonic() < deadline:
+        if connection is None:
+            connection = connect(path, profile['pragmas'])
+        number += 1
+        try:
+            if role == 'read':
+                connection.execute(READ, (number % AUTHORS,)).fetchall()
+            else:
+                with connection:
+                    connection.execute(WRITE, (number % AUTHORS, 'текст'))
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        if not profile['reuse']:
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+    results.put((role, done, errors))
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при параллельных '
+            'чтениях и записях с настройками по умолчанию и с '
+            'SQLITE_PRAGMAS и постоянными соединениями')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Количество читающих процессов'
+        )
+        parser.add_argument(
+            '--writers', type=int, default=1,
+            help='Количество пишущих процессов'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность замера для каждого профиля, с'
+        )
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help='Сколько строк в таблице перед замером'
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов (по умолчанию stdout)'
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            name: self.measure(dict(profile, pragmas=(
+                settings.SQLITE_PRAGMAS if profile['pragmas'] is None
+                else profile['pragmas'])), options)
+            for name, profile in PROFILES.items()
+        }
+        for name, result in results.items():
+            self.stderr.write(
+                f'{name}: чтений {result["reads_per_s"]}/с, '
+                f'записей {result["writes_per_s"]}/с, '
+                f'ошибок {result["errors"]}'
+            )
+        report = json.dumps({
+            'options': {key: options[key] for key in (
+                'readers', 'writers', 'duration', 'rows')},
+            'pragmas': settings.SQLITE_PRAGMAS,
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def measure(self, profile, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.sqlite3')
+            prepare(path, options['rows'], profile['pragmas'])
+            queue = multiprocessing.Queue()
+            deadline = time.monotonic() + options['duration']
+            processes = [
+                multiprocessing.Process(
+                    target=run, args=(role, path, profile, deadline, queue))
+                for role, count in (('read', options['readers']),
+                                    ('write', options['writers']))
+                for _ in range(count)
+            ]
+            for process in processes:
+                process.start()
+            totals = {'read': 0, 'write': 0, 'errors': 0}
+            for _ in processes:
+                role, done, errors = queue.get()
+                totals[role] += done
+                totals['errors'] += errors
+            for process in processes:
+                process.join()
+        return {
+            'reads_per_s': round(totals['read'] / options['duration']),
+            'writes_per_s': round(totals['write'] / options['duration']),
+            'errors': totals['errors'],
+        }
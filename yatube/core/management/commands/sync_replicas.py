@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS; '
+            'для локальной проверки чтения с реплик')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Команда работает только с SQLite, для других СУБД '
+                'используйте их собственную репликацию'
+            )
+        if not replicas():
+            raise CommandError('DATABASE_REPLICAS пуст')
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in replicas():
+                connections[alias].close()
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: скопировано')
+        finally:
+            source.close()
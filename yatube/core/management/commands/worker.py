@@ -0,0 +1,56 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+
+def run_worker(stop, once):
+    # Ctrl+C обрабатывает родительский процесс, он же останавливает
+    # обработчики, дав им закончить текущую задачу.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    tasks.work(stop=stop, once=once)
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов-обработчиков'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Завершиться, когда очередь опустеет'
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] == 1:
+            tasks.work(once=options['once'])
+            return
+        # Соединение с базой не должно наследоваться дочерними процессами.
+        connections.close_all()
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(stop, options['once'])
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,104 @@
+"""Метрики текущего запроса: запросы к БД, шаблоны и кеш.
+
+Счётчики хранятся в contextvar и заполняются только внутри
+``collect()``; вне запроса (команды, обработчики очереди) функции
+записи ничего не делают.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_local_hits = 0
+        self.cache_shared_hits = 0
+        self._template_depth = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_time * 1000, 1),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_local_hits': self.cache_local_hits,
+            'cache_shared_hits': self.cache_shared_hits,
+        }
+
+
+def current():
+    return _current.get()
+
+
+def _query_timer(execute, sql, params, many, context):
+    metrics = current()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_time += time.perf_counter() - started
+
+
+@contextmanager
+def collect():
+    """Собирает метрики всего, что выполняется внутри блока."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_query_timer))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def template_timer():
+    """Учитывает время отрисовки шаблона. Вложенные шаблоны (include,
+    render_to_string внутри тега) входят во время внешнего."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics._template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._template_depth -= 1
+        if not metrics._template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def record_cache(hits, misses):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def record_cache_tiers(local_hits, shared_hits):
+    """Попадания по уровням многоуровневого кеша (core.cache_backends)."""
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_local_hits += local_hits
+        metrics.cache_shared_hits += shared_hits
@@ -0,0 +1,83 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, routers
+
+logger = logging.getLogger('yatube.timing')
+
+
+def server_timing(request_metrics):
+    values = request_metrics.as_dict()
+    return ', '.join((
+        f'db;dur={values["db_ms"]};desc="{values["queries"]} queries"',
+        f'tpl;dur={values["template_ms"]}',
+        (f'cache;desc="hits={values["cache_hits"]} '
+         f'misses={values["cache_misses"]} '
+         f'local={values["cache_local_hits"]} '
+         f'shared={values["cache_shared_hits"]}"'),
+        f'total;dur={values["total_ms"]}',
+    ))
+
+
+class ServerTimingMiddleware:
+    """Добавляет к ответу заголовок Server-Timing с числом и временем
+    запросов к БД, временем отрисовки шаблонов и попаданиями в кеш,
+    и пишет те же значения в лог ``yatube.timing``.
+
+    Включается настройкой SERVER_TIMING. Без DEBUG заголовок
+    добавляется только к ответам сотрудникам, лог пишется для всех.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.collect() as request_metrics:
+            response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = server_timing(request_metrics)
+        values = request_metrics.as_dict()
+        logger.info(
+            'method=%s path=%s status=%s %s',
+            request.method, request.path, response.status_code,
+            ' '.join(f'{key}={value}' for key, value in values.items()),
+            extra={'timing': values},
+        )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Направляет чтения запроса на реплики (core.routers) и после
+    записи закрепляет пользователя за основной базой на
+    REPLICA_PIN_SECONDS с помощью cookie.
+
+    Без настроенных реплик не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not routers.replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.REPLICA_PIN_COOKIE
+        state = routers.RoutingState(
+            pinned=cookie in request.COOKIES
+            or request.method not in ('GET', 'HEAD', 'OPTIONS')
+        )
+        token = routers.activate(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.deactivate(token)
+        if state.wrote:
+            response.set_cookie(
+                cookie, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,206 @@
+"""Keyset-пагинация (по курсору) без OFFSET и COUNT(*).
+
+Страница выбирается условием по ключу сортировки последнего показанного
+объекта, например ``(created, id) < (:created, :id)``, поэтому глубокие
+страницы стоят столько же, сколько первая. Курсор непрозрачен для
+клиента: это base64 от направления и значений ключа.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Самая глубокая страница, которую можно открыть по номеру: OFFSET
+# не больше (MAX_PAGE_NUMBER - 1) * per_page.
+MAX_PAGE_NUMBER = 10
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    raw = json.dumps([direction, *values], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, *values = json.loads(raw.decode())
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+class CursorPaginator(Paginator):
+    """Paginator, выбирающий страницы по ключу сортировки.
+
+    Ключ берётся из ``ordering`` или из order_by запроса (Meta.ordering
+    модели); во втором случае он дополняется первичным ключом, чтобы быть
+    уникальным. Явно переданный ``ordering`` должен быть уникален сам.
+
+    Номера страниц (``?page=N``) поддерживаются для совместимости: первая
+    страница отдаётся курсорным запросом, остальные — срезом без COUNT(*),
+    после чего навигация продолжается по курсорам. Номер больше
+    MAX_PAGE_NUMBER вызывает EmptyPage, так что OFFSET ограничен.
+
+    Значения курсора приводятся к типам полей ключа; курсор, который
+    не удаётся привести, вызывает InvalidCursor.
+
+    Возвращает обычный ``Page``, дополненный атрибутами ``next_cursor`` и
+    ``previous_cursor``. Число страниц неизвестно, поэтому ``num_pages``
+    отражает лишь то, что есть соседние страницы: его хватает для
+    ``has_next()``/``has_previous()``.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if ordering is None:
+            ordering = self._key_ordering(object_list)
+        self.ordering = [(field.lstrip('-'), field.startswith('-'))
+                         for field in ordering]
+
+    @staticmethod
+    def _key_ordering(queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id', queryset.model._meta.pk.name}:
+            descending = ordering and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    @staticmethod
+    def _value(obj, field):
+        value = getattr(obj, field)
+        return value.pk if hasattr(value, 'pk') else value
+
+    def _key_field(self, name):
+        """Поле модели или аннотации запроса для поля ключа."""
+        queryset = self.object_list
+        if name == 'pk':
+            return queryset.model._meta.pk
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode(self, cursor):
+        """Направление и значения ключа из курсора, приведённые к типам
+        полей."""
+        direction, values = decode_cursor(cursor)
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._key_field(field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if any(value is None for value in values):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def cursor_for(self, obj, direction):
+        return encode_cursor(
+            direction,
+            [self._value(obj, field) for field, _ in self.ordering]
+        )
+
+    def _ordered(self, reverse=False):
+        return self.object_list.order_by(*(
+            f'{"-" if descending != reverse else ""}{field}'
+            for field, descending in self.ordering
+        ))
+
+    def _seek(self, values, reverse):
+        """Условие «строго после ключа» в порядке сортировки."""
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _make_page(self, rows, number, has_next, has_previous):
+        self.num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = (
+            self.cursor_for(rows[-1], NEXT) if has_next else None
+        )
+        page.previous_cursor = (
+            self.cursor_for(rows[0], PREVIOUS)
+            if has_previous and rows else None
+        )
+        return page
+
+    def _rows(self, limit, values=None, reverse=False, offset=0):
+        """Объекты после ключа ``values`` в порядке сортировки
+        (в обратном, если ``reverse``)."""
+        queryset = self._ordered(reverse)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+        return list(queryset[offset:offset + limit])
+
+    def page(self, number=None, cursor=None):
+        if cursor:
+            direction, values = self.decode(cursor)
+            reverse = direction == PREVIOUS
+            rows = self._rows(self.per_page + 1, values, reverse)
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            if reverse:
+                rows.reverse()
+                return self._make_page(rows, 1 + has_more, True, has_more)
+            return self._make_page(rows, 2, has_more, True)
+        number = self.validate_number(number or 1)
+        offset = (number - 1) * self.per_page
+        rows = self._rows(self.per_page + 1, offset=offset)
+        return self._make_page(rows[:self.per_page], number,
+                               len(rows) > self.per_page, number > 1)
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        if number > MAX_PAGE_NUMBER:
+            raise EmptyPage(
+                f'Страницы дальше {MAX_PAGE_NUMBER} открываются по курсору')
+        return max(number, 1)
+
+    def get_page(self, number=None, cursor=None):
+        """Страница по номеру или курсору; при негодном курсоре — первая.
+        Слишком большой номер вызывает EmptyPage."""
+        try:
+            return self.page(number=number, cursor=cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """CursorPaginator для ``.values()``: строки — словари, в выборку
+    к ``lookups`` добавляются поля ключа сортировки."""
+
+    def __init__(self, queryset, per_page, lookups, ordering=None,
+                 **kwargs):
+        if ordering is None:
+            ordering = self._key_ordering(queryset)
+        keys = [field.lstrip('-') for field in ordering]
+        values = list(dict.fromkeys([*lookups, *keys]))
+        super().__init__(queryset.values(*values), per_page,
+                         ordering=ordering, **kwargs)
+
+    @staticmethod
+    def _value(row, field):
+        return row[field]
@@ -0,0 +1,87 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в ``settings.DATABASE_REPLICAS``. Внутри запроса
+(``ReplicaPinningMiddleware``) чтения уходят на случайную реплику,
+пока запрос ничего не записал; после первой записи и до конца запроса
+всё читается из основной базы. Ответ на такой запрос ставит cookie,
+и следующие запросы пользователя в течение REPLICA_PIN_SECONDS тоже
+читают из основной базы — так он сразу видит свой пост, комментарий
+или подписку, даже если реплика отстаёт.
+
+Вне запросов (команды, обработчик очереди) всё идёт в основную базу.
+Туда же уходят чтения внутри ``primary()``: так строятся страницы,
+которые кладутся в кеш под текущим поколением (core.cache) — данные
+отстающей реплики остались бы там до следующего изменения.
+
+Локально реплику можно проверить на двух файлах SQLite: указать
+``DATABASE_REPLICAS = ['replica']`` и копировать основную базу в
+реплику командой ``manage.py sync_replicas``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def current_state():
+    return _state.get()
+
+
+def activate(state):
+    return _state.set(state)
+
+
+def deactivate(token):
+    _state.reset(token)
+
+
+@contextmanager
+def primary():
+    """Чтения внутри блока идут в основную базу. Если в блоке была
+    запись, запрос остаётся закреплённым за ней и после."""
+    state = _state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = state.wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        aliases = replicas()
+        if state is None or state.pinned or not aliases:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На всех базах одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db == DEFAULT_DB_ALIAS
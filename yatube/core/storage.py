@@ -0,0 +1,69 @@
+"""Хранилище файлов, адресуемых по содержимому.
+
+Имя файла — SHA-256 его содержимого, разложенный по подкаталогам по
+первым символам хеша (``posts/ab/cd/abcd….jpg``), поэтому в одном
+каталоге не скапливаются тысячи файлов, а повторная загрузка той же
+картинки не создаёт копию.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+# Префикс недописанных файлов: имя готового файла — шестнадцатеричный
+# хеш, поэтому с ним не совпадает.
+TEMP_PREFIX = '.upload-'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    @staticmethod
+    def content_name(name, content):
+        """Имя файла по его содержимому в каталоге исходного имени."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        shards = [
+            digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+            for i in range(SHARD_DEPTH)
+        ]
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name), *shards, digest + extension
+        ).replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        # Одинаковое имя означает одинаковое содержимое, переименовывать
+        # нечего.
+        return name
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # Запись во временный файл и переименование: параллельные загрузки
+        # одного содержимого не видят недописанный файл.
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
@@ -0,0 +1,180 @@
+"""Очередь фоновых задач в основной базе данных.
+
+Задача — строка таблицы Task с именем функции и аргументами в JSON.
+Она записывается в той же транзакции, что и данные, которые её
+породили, поэтому не теряется и не выполняется для отменённых
+изменений. Обработчик (``manage.py worker``) забирает задачу условным
+UPDATE ... WHERE status = 'queued', так что одну задачу получает
+ровно один процесс. Упавшая задача повторяется с экспоненциальной
+задержкой, задача «зависшего» обработчика возвращается в очередь
+по истечении аренды.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+BASE_DELAY = 10
+MAX_DELAY = 60 * 60
+LEASE = 60 * 10
+POLL_INTERVAL = 1
+
+
+def task(max_attempts=5):
+    """Делает функцию фоновой задачей: ``func.delay(*args, **kwargs)``
+    ставит её вызов в очередь. Аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        def delay(*args, key='', **kwargs):
+            return enqueue(name, *args, key=key,
+                           max_attempts=max_attempts, **kwargs)
+
+        def delay_many(calls):
+            return enqueue_many(name, calls, max_attempts=max_attempts)
+
+        func.delay = delay
+        func.delay_many = delay_many
+        return func
+    return decorator
+
+
+def enqueue(name, *args, key='', max_attempts=5, **kwargs):
+    """Ставит вызов функции ``name`` в очередь.
+
+    Если задан ``key`` и задача с тем же ключом ещё ждёт выполнения или
+    исчерпала попытки (FAILED), новая не создаётся — как в enqueue_many.
+    """
+    if key and Task.objects.filter(
+            key=key, status__in=(Task.QUEUED, Task.FAILED)).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        key=key,
+        max_attempts=max_attempts,
+        run_at=timezone.now(),
+    )
+
+
+def enqueue_many(name, calls, max_attempts=5):
+    """Ставит в очередь несколько вызовов ``name`` за два запроса.
+
+    ``calls`` — словарь {ключ: список аргументов}; ключи, задачи с
+    которыми уже ждут выполнения или исчерпали попытки (FAILED),
+    пропускаются: упавшую задачу возвращают в очередь вручную.
+    """
+    queued = set(Task.objects.filter(
+        key__in=list(calls), status__in=(Task.QUEUED, Task.FAILED)
+    ).values_list('key', flat=True))
+    now = timezone.now()
+    tasks = [
+        Task(
+            name=name,
+            payload=json.dumps({'args': list(args), 'kwargs': {}}),
+            key=key,
+            max_attempts=max_attempts,
+            run_at=now,
+        )
+        for key, args in calls.items() if key not in queued
+    ]
+    return Task.objects.bulk_create(tasks) if tasks else []
+
+
+def backoff(attempts):
+    """Задержка перед повтором: 10 с, 20 с, 40 с… не больше часа,
+    со случайным разбросом, чтобы повторы не совпадали."""
+    delay = min(BASE_DELAY * 2 ** (attempts - 1), MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _claimable(now):
+    return (
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_at__lt=now - timedelta(seconds=LEASE))
+    )
+
+
+def claim(worker):
+    """Забирает одну готовую к выполнению задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Task.objects.filter(_claimable(now)).order_by(
+        'run_at', 'pk').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = Task.objects.filter(_claimable(now), pk=pk).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(task_row):
+    """Выполняет задачу: удаляет её при успехе, иначе планирует повтор
+    или отмечает как FAILED."""
+    try:
+        payload = json.loads(task_row.payload)
+        import_string(task_row.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', task_row)
+        error = traceback.format_exc()
+        if task_row.attempts < task_row.max_attempts:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.QUEUED,
+                run_at=timezone.now() + backoff(task_row.attempts),
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+            )
+        else:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.FAILED, last_error=error
+            )
+        return False
+    Task.objects.filter(pk=task_row.pk).delete()
+    return True
+
+
+def run_next(worker=None):
+    """Выполняет одну задачу. Возвращает False, если очередь пуста."""
+    task_row = claim(worker or worker_name())
+    if task_row is None:
+        return False
+    execute(task_row)
+    return True
+
+
+def work(stop=None, once=False, poll_interval=POLL_INTERVAL):
+    """Цикл обработчика: выполняет задачи, пока ``stop`` не установлен.
+
+    С ``once`` завершается, когда очередь опустела.
+    """
+    worker = worker_name()
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        if run_next(worker):
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,44 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Файл, загрузка которого прервана из-за размера: содержимого нет,
+    ``size`` — сколько байт прислал клиент."""
+
+    def __init__(self, name, content_type, size, charset):
+        super().__init__(BytesIO(), name, content_type, size, charset)
+
+
+def is_oversized(upload):
+    return (
+        isinstance(upload, OversizedUploadedFile)
+        or upload.size > settings.FILE_UPLOAD_MAX_SIZE
+    )
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Перестаёт передавать файл следующим обработчикам, как только он
+    превысил FILE_UPLOAD_MAX_SIZE, и отдаёт вместо него
+    OversizedUploadedFile."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.FILE_UPLOAD_MAX_SIZE:
+            self.oversized = True
+        if self.oversized:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        return OversizedUploadedFile(
+            self.file_name, self.content_type, file_size, self.charset
+        )
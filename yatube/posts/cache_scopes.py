@@ -0,0 +1,72 @@
+"""Области кеша страниц постов и события, которые их инвалидируют."""
+from core.cache import bump_on_commit
+
+from .models import Post
+
+ALL_POSTS = 'posts'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def index_scopes(request):
+    return (ALL_POSTS,)
+
+
+def search_scopes(request):
+    return (ALL_POSTS,)
+
+
+def group_scopes(request, slug):
+    return (group_scope(slug),)
+
+
+def profile_scopes(request, username):
+    return (author_scope(username),)
+
+
+def post_detail_scopes(request, post_id):
+    # На странице поста выводится число постов автора, поэтому она
+    # зависит и от любых новых постов.
+    return (ALL_POSTS, post_scope(post_id))
+
+
+def post_changed(post):
+    scopes = [ALL_POSTS, author_scope(post.author.username),
+              post_scope(post.pk)]
+    if post.group_id:
+        scopes.append(group_scope(post.group.slug))
+    bump_on_commit(*scopes)
+
+
+def group_changed(slug):
+    bump_on_commit(ALL_POSTS, group_scope(slug))
+
+
+def group_edited(group):
+    """Название и адрес группы выводятся и на страницах её авторов."""
+    authors = Post.objects.filter(group_id=group.pk).order_by().values_list(
+        'author__username', flat=True).distinct()
+    bump_on_commit(*map(author_scope, authors))
+
+
+def comment_changed(comment):
+    bump_on_commit(post_scope(comment.post_id))
+
+
+def follow_changed(follow):
+    bump_on_commit(author_scope(follow.author.username),
+                   author_scope(follow.user.username))
+
+
+def user_changed(user):
+    bump_on_commit(author_scope(user.username))
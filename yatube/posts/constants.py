@@ -1,3 +1,16 @@
 MAX_POST_TEXT_LENGTH = 15
 POST_OBJ = 10
-CACHE_TTL = 20
+CACHE_TTL = 60 * 60 * 6
+TIMELINE_BATCH_SIZE = 500
+COUNTERS_CHUNK_SIZE = 1000
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_FORMATS = ('JPEG', 'WEBP')
+THUMBNAIL_SIZES = '(max-width: 992px) 100vw, 960px'
+THUMBNAIL_WORKERS = 2
+POST_IMAGE_MAX_DIMENSION = 2048
+POST_IMAGE_QUALITY = 85
+FEED_SIZE = 50
+FEED_TITLE_LENGTH = 60
+MEDIA_GRACE_PERIOD = 60 * 60
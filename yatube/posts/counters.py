@@ -0,0 +1,88 @@
+"""Денормализованные счётчики постов, подписок и комментариев.
+
+Счётчики меняются атомарными UPDATE ... SET x = x + 1 в той же
+транзакции, что и запись, поэтому страницы профиля и поста не выполняют
+COUNT(*). Команда reconcile_counters пересчитывает их с нуля.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Comment, Follow, Post, UserStats
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+}
+
+
+def _grouped_counts(model, field, ids):
+    return dict(
+        model.objects.filter(**{f'{field}__in': ids}).values(field)
+        .annotate(total=Count('pk')).order_by()
+        .values_list(field, 'total')
+    )
+
+
+def _changes(**deltas):
+    return {
+        name: Greatest(F(name) + delta, 0)
+        for name, delta in deltas.items()
+    }
+
+
+@transaction.atomic
+def recompute_users(user_ids):
+    """Пересчитывает счётчики пользователей по данным в базе."""
+    counts = {
+        name: _grouped_counts(model, field, user_ids)
+        for name, (model, field) in USER_COUNTERS.items()
+    }
+    existing = {
+        stats.user_id: stats
+        for stats in UserStats.objects.filter(user_id__in=user_ids)
+    }
+    missing = []
+    for user_id in user_ids:
+        stats = existing.get(user_id) or UserStats(user_id=user_id)
+        for name in USER_COUNTERS:
+            setattr(stats, name, counts[name].get(user_id, 0))
+        if user_id not in existing:
+            missing.append(stats)
+    UserStats.objects.bulk_update(existing.values(), list(USER_COUNTERS))
+    UserStats.objects.bulk_create(missing)
+
+
+@transaction.atomic
+def recompute_posts(post_ids):
+    """Пересчитывает количество комментариев у постов."""
+    counts = _grouped_counts(Comment, 'post_id', post_ids)
+    posts = list(Post.objects.filter(pk__in=post_ids).only('pk'))
+    for post in posts:
+        post.comments_count = counts.get(post.pk, 0)
+    Post.objects.bulk_update(posts, ['comments_count'])
+
+
+def change_user(user_id, **deltas):
+    """Сдвигает счётчики пользователя на заданные величины."""
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **_changes(**deltas)
+    )
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        recompute_users([user_id])
+
+
+def change_post(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        **_changes(comments_count=delta)
+    )
+
+
+def get_stats(user):
+    """Счётчики пользователя; отсутствующая запись создаётся пересчётом."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recompute_users([user.pk])
+        return UserStats.objects.get(user=user)
@@ -0,0 +1,192 @@
+"""Ленты Atom и RSS: все посты, посты группы и посты автора.
+
+Посты выбираются keyset-запросом (CursorPaginator, ``?cursor=``), XML
+отдаётся потоком по записи. Готовое тело ленты кешируется вместе с
+поколениями её областей кеша и отдаётся из кеша, пока они не
+изменятся; ETag и Last-Modified строятся так же, как для страниц.
+"""
+import hashlib
+import io
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from core import routers
+from core.budget import query_budget
+from core.cache import state, validators
+from core.paginator import CursorPaginator
+
+from . import cache_scopes
+from .constants import CACHE_TTL, FEED_SIZE, FEED_TITLE_LENGTH
+from .models import Group, Post
+
+User = get_user_model()
+
+
+class AtomFeed(Atom1Feed):
+    """Atom с ссылкой rel="next" на следующую страницу (RFC 5005)."""
+    next_link = None
+
+    def add_root_elements(self, handler):
+        super().add_root_elements(handler)
+        if self.next_link:
+            handler.addQuickElement(
+                'link', '', {'rel': 'next', 'href': self.next_link})
+
+
+FEED_TYPES = {'atom': AtomFeed, 'rss': Rss201rev2Feed}
+ITEM_ELEMENTS = {'atom': 'entry', 'rss': 'item'}
+FEED_KEY = 'feed:{}'
+
+
+def _drain(buffer):
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def write_feed(feed, feed_format, items):
+    """XML ленты по частям: заголовок, затем по одной записи.
+
+    Повторяет ``SyndicationFeed.write``, но не собирает все записи
+    в памяти до начала вывода.
+    """
+    buffer = io.StringIO()
+    handler = SimplerXMLGenerator(buffer, 'utf-8')
+    handler.startDocument()
+    if feed_format == 'rss':
+        handler.startElement('rss', feed.rss_attributes())
+        handler.startElement('channel', feed.root_attributes())
+    else:
+        handler.startElement('feed', feed.root_attributes())
+    feed.add_root_elements(handler)
+    yield _drain(buffer)
+    element = ITEM_ELEMENTS[feed_format]
+    for item in items:
+        feed.add_item(**item)
+        item = feed.items.pop()
+        handler.startElement(element, feed.item_attributes(item))
+        feed.add_item_elements(handler, item)
+        handler.endElement(element)
+        yield _drain(buffer)
+    if feed_format == 'rss':
+        feed.endChannelElement(handler)
+        handler.endElement('rss')
+    else:
+        handler.endElement('feed')
+    yield _drain(buffer)
+
+
+def post_items(request, posts):
+    for post in posts:
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', args=(post.pk,)))
+        author = post.author
+        yield {
+            'title': post.text[:FEED_TITLE_LENGTH],
+            'link': link,
+            'unique_id': link,
+            'description': post.text,
+            'author_name': author.get_full_name() or author.username,
+            'pubdate': post.created,
+            'updateddate': post.updated,
+            'categories': [post.group.title] if post.group else None,
+        }
+
+
+def _cache_body(chunks, key, versions):
+    """Отдаёт части тела и после последней кладёт тело в кеш. Если
+    клиент отключился раньше, ничего не кешируется."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, {'version': versions, 'body': ''.join(parts)}, CACHE_TTL)
+
+
+def render_feed(request, feed_format, scopes, title, link, post_list):
+    feed_class = FEED_TYPES.get(feed_format)
+    if feed_class is None:
+        raise Http404
+    versions, modified = state(*scopes)
+    etag, last_modified = validators(
+        request, f'feed:{feed_format}', versions, modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # Лента одинакова для всех пользователей: ключ — только адрес.
+        key = FEED_KEY.format(hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest())
+        cached = cache.get(key)
+        if cached is not None and cached['version'] == versions:
+            response = HttpResponse(cached['body'])
+        else:
+            # Тело ляжет в кеш под текущими поколениями: посты читаются
+            # из основной базы, а не с возможно отстающей реплики.
+            with routers.primary():
+                page = CursorPaginator(post_list, FEED_SIZE).get_page(
+                    cursor=request.GET.get('cursor'))
+            feed = feed_class(
+                title=title,
+                link=request.build_absolute_uri(link),
+                description=title,
+                feed_url=request.build_absolute_uri(),
+                language='ru',
+            )
+            feed.latest_post_date = lambda: datetime.fromtimestamp(
+                last_modified, timezone.utc)
+            if page.next_cursor:
+                feed.next_link = request.build_absolute_uri(
+                    f'{request.path}?cursor={page.next_cursor}')
+            chunks = write_feed(
+                feed, feed_format, post_items(request, page.object_list))
+            response = StreamingHttpResponse(
+                _cache_body(chunks, key, versions))
+        response['Content-Type'] = feed_class.content_type
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _posts():
+    return Post.objects.select_related('author', 'group')
+
+
+@query_budget(5)
+def index_feed(request, feed_format):
+    return render_feed(
+        request, feed_format, cache_scopes.index_scopes(request),
+        'Yatube: последние записи', reverse('posts:index'), _posts(),
+    )
+
+
+@query_budget(6)
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    return render_feed(
+        request, feed_format, cache_scopes.group_scopes(request, slug),
+        f'Yatube: {group.title}',
+        reverse('posts:group_list', args=(slug,)),
+        _posts().filter(group=group),
+    )
+
+
+@query_budget(6)
+def profile_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    return render_feed(
+        request, feed_format,
+        cache_scopes.profile_scopes(request, username),
+        f'Yatube: записи {author.get_full_name() or username}',
+        reverse('posts:profile', args=(username,)),
+        _posts().filter(author=author),
+    )
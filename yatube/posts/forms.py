@@ -1,5 +1,11 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
 
+from core.uploads import is_oversized
+
+from . import images
 from .models import Comment, Post
 
 
@@ -14,6 +20,35 @@ class PostForm(forms.ModelForm):
                       'group': 'К какой группе отнесем пост?',
                       }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Слишком большой файл не передаётся полю: его проверка открыла бы
+        # пустой файл и сообщила о «повреждённой картинке».
+        name = self.add_prefix('image')
+        upload = self.files.get(name)
+        self.image_too_large = upload is not None and is_oversized(upload)
+        if self.image_too_large:
+            self.files = self.files.copy()
+            del self.files[name]
+
+    def clean_image(self):
+        if self.image_too_large:
+            raise forms.ValidationError(
+                'Размер картинки не должен превышать %(limit)s.',
+                code='file_too_large',
+                params={
+                    'limit': filesizeformat(settings.FILE_UPLOAD_MAX_SIZE)
+                },
+            )
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            try:
+                return images.normalize(image)
+            except images.InvalidImage:
+                raise forms.ValidationError(
+                    'Не удалось обработать картинку.', code='invalid_image')
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
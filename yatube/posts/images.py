@@ -0,0 +1,75 @@
+"""Нормализация загруженных картинок постов.
+
+Картинка уменьшается до POST_IMAGE_MAX_DIMENSION по большей стороне,
+поворачивается по EXIF и сохраняется без метаданных (кроме цветового
+профиля). Для JPEG уменьшение начинается ещё при декодировании
+(``draft``), а крупные картинки сначала сжимаются в целое число раз
+(``reduce``), поэтому полное разрешение в память не загружается.
+
+Если Pillow не может записать картинку в её формате, сохраняется
+исходный файл.
+"""
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+from posts.constants import POST_IMAGE_MAX_DIMENSION, POST_IMAGE_QUALITY
+
+# Фотографии с телефонов и камер часто открываются как MPO (JPEG
+# с дополнительными кадрами), а записывать MPO умеют не все версии
+# Pillow. Такие картинки сохраняются как JPEG из первого кадра.
+SAVE_FORMATS = {'MPO': 'JPEG'}
+# Image.reduce не работает с палитрой и однобитными картинками: перед
+# уменьшением они переводятся в полноцветный режим или оттенки серого.
+REDUCE_MODES = {'1': 'L', 'P': 'RGBA'}
+# Ошибки Pillow при чтении и обработке повреждённой картинки.
+PILLOW_ERRORS = (OSError, SyntaxError, ValueError, KeyError,
+                 Image.DecompressionBombError)
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def normalize(upload, max_dimension=POST_IMAGE_MAX_DIMENSION):
+    """Возвращает нормализованную копию загруженного файла.
+
+    Анимированные картинки возвращаются без изменений. Картинка, которую
+    Pillow не смог прочитать или уменьшить, вызывает InvalidImage.
+    """
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        if (image.format not in SAVE_FORMATS
+                and getattr(image, 'is_animated', False)):
+            upload.seek(0)
+            return upload
+        image_format = SAVE_FORMATS.get(image.format, image.format)
+        icc_profile = image.info.get('icc_profile')
+        image.draft(image.mode, (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        factor = max(image.size) // max_dimension
+        if factor > 1:
+            if image.mode in REDUCE_MODES:
+                image = image.convert(REDUCE_MODES[image.mode])
+            image = image.reduce(factor)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    except PILLOW_ERRORS as error:
+        raise InvalidImage(error)
+    options = {'format': image_format}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if image_format == 'JPEG':
+        options.update(
+            quality=POST_IMAGE_QUALITY, optimize=True, progressive=True
+        )
+    content = BytesIO()
+    try:
+        image.save(content, **options)
+    except (KeyError, OSError, ValueError):
+        upload.seek(0)
+        return upload
+    return SimpleUploadedFile(
+        upload.name, content.getvalue(), content_type=upload.content_type
+    )
@@ -0,0 +1,176 @@
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from posts import urls
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Эти адреса изменяют данные, поэтому в замеры не входят.
+MUTATING = {'add_comment', 'profile_follow', 'profile_unfollow'}
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95) и число запросов к БД для всех '
+            'адресов posts/urls.py и сохраняет результат в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help='Сколько замеров на адрес'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Сколько запросов на адрес сделать до замеров'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов (по умолчанию stdout)'
+        )
+
+    def handle(self, *args, **options):
+        user = self.sample_user()
+        client = Client()
+        client.force_login(user)
+        results = {}
+        for name, url in self.urls(user):
+            if url is None:
+                results[name] = {'skipped': True}
+                continue
+            results[name] = self.measure(client, url, options)
+            self.stderr.write(
+                f'{name}: p50={results[name]["p50_ms"]} мс, '
+                f'p95={results[name]["p95_ms"]} мс, '
+                f'запросов={results[name]["queries_max"]}'
+            )
+        report = json.dumps({
+            'meta': self.meta(options),
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def sample_user(self):
+        """Пользователь с наибольшим числом подписок: его лента тяжелее
+        всего."""
+        row = Follow.objects.values('user').annotate(
+            total=Count('pk')).order_by('-total').first()
+        user = User.objects.filter(pk=row['user']).first() if row else None
+        user = user or User.objects.filter(posts__isnull=False).first()
+        if user is None:
+            raise CommandError(
+                'В базе нет данных: запустите manage.py generate_data'
+            )
+        return user
+
+    def urls(self, user):
+        post = user.posts.order_by('-pk').first() or Post.objects.order_by(
+            '-pk').first()
+        group = Group.objects.annotate(total=Count('group')).order_by(
+            '-total').first()
+        author = User.objects.annotate(total=Count('posts')).order_by(
+            '-total').first()
+        words = post.text.split() if post else []
+        values = {
+            'slug': group.slug if group else None,
+            'username': author.username if author else None,
+            'post_id': post.pk if post else None,
+            'feed_format': 'atom',
+        }
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = pattern.name
+            kwargs = {
+                key: values[key] for key in pattern.pattern.converters
+            }
+            if name in MUTATING or None in kwargs.values():
+                yield name, None
+                continue
+            url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs)
+            if name == 'search' and words:
+                url += f'?q={words[0]}'
+            yield name, url
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings = []
+        queries = []
+        statuses = set()
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+        return {
+            'url': url,
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries_p50': percentile(queries, 50),
+            'queries_max': max(queries),
+        }
+
+    def meta(self, options):
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'cold': options['cold'],
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+        }
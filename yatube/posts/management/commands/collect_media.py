@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts import media
+from posts.models import MediaBlob, Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает ссылки на файлы картинок и удаляет файлы, '
+            'на которые не ссылается ни один пост')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, какие файлы будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        media.recount()
+        # Недавно записанные файлы пропускаются: пост с ними может быть
+        # ещё не сохранён.
+        unreferenced = {
+            name for name in MediaBlob.objects.filter(
+                references=0).values_list('name', flat=True)
+            if media.settled(name)
+        }
+        directory = Post._meta.get_field('image').upload_to.strip('/')
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        orphans = [
+            name for name in media.stored_files(directory)
+            if name not in known and media.settled(name)
+        ]
+        if options['dry_run']:
+            for name in sorted(unreferenced.union(orphans)):
+                self.stdout.write(name)
+            return
+        deleted = sum(media.collect(name) for name in unreferenced)
+        # Файлы без записи в MediaBlob: учитываются как блоб без ссылок.
+        MediaBlob.objects.bulk_create(
+            MediaBlob(name=name, references=0) for name in orphans
+        )
+        deleted += sum(media.collect(name) for name in orphans)
+        self.stdout.write(self.style.SUCCESS(f'Удалено файлов: {deleted}'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки потоком NDJSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--types', nargs='+', choices=transfer.TYPES,
+            default=list(transfer.TYPES),
+            help='Какие записи выгружать'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки (по умолчанию stdout)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        types = [kind for kind in transfer.TYPES if kind in options['types']]
+        records = transfer.export_records(types, options['chunk_size'])
+        if options['output'] == '-':
+            output = self.stdout
+        else:
+            output = open(options['output'], 'w', encoding='utf-8')
+        total = 0
+        try:
+            for record in records:
+                output.write(transfer.to_ndjson(record) + '\n')
+                total += 1
+        finally:
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write(f'Выгружено записей: {total}')
@@ -0,0 +1,153 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from faker import Faker
+
+from core.cache import bump
+from posts import cache_scopes
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу воспроизводимым набором тестовых данных '
+            'для нагрузочных замеров')
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 1000), ('groups', 50),
+                              ('posts', 20000), ('comments', 50000),
+                              ('follows', 20000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать ({default} по умолчанию)'
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько строк вставлять одним запросом'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не перестраивать ленты, счётчики и поисковый индекс'
+        )
+
+    def handle(self, *args, **options):
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        users = self.create_users(options['users'])
+        groups = self.create_groups(options['groups'])
+        posts = self.create(Post, options['posts'], lambda: Post(
+            author_id=self.random.choice(users),
+            group_id=self.random.choice(groups) if (
+                groups and self.random.random() < 0.5) else None,
+            text=self.fake.text(max_nb_chars=400),
+        ))
+        self.create(Comment, options['comments'], lambda: Comment(
+            post_id=self.random.choice(posts),
+            author_id=self.random.choice(users),
+            text=self.fake.sentence(),
+        ))
+        self.create_follows(users, options['follows'])
+
+        if not options['skip_derived']:
+            for command in ('reconcile_counters', 'rebuild_timelines',
+                            'rebuild_search_index'):
+                call_command(command, stdout=self.stdout)
+        # Пользователи и группы новые, поэтому закешированы могут быть
+        # только страницы, зависящие от всех постов.
+        bump(cache_scopes.ALL_POSTS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, групп: {len(groups)}, '
+            f'постов: {len(posts)}'
+        ))
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def create(self, model, total, make):
+        """Создаёт ``total`` объектов порциями и возвращает диапазон их id.
+
+        Пока в базу пишет только эта команда, id новых строк идут подряд,
+        и диапазон не хранит миллионы чисел в памяти.
+        """
+        last_id = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        for size in self.batches(total):
+            with transaction.atomic():
+                model.objects.bulk_create(make() for _ in range(size))
+        new_ids = model.objects.filter(pk__gt=last_id).aggregate(
+            first=Min('pk'), last=Max('pk'))
+        if new_ids['first'] is None:
+            return range(0)
+        return range(new_ids['first'], new_ids['last'] + 1)
+
+    def create_users(self, total):
+        # Хеш пароля дорогой, поэтому он один на всех: «password».
+        password = make_password('password')
+        prefix = f'user{self.random.randrange(10 ** 6)}_'
+        counter = iter(range(total))
+
+        def make():
+            number = next(counter)
+            return User(
+                username=f'{prefix}{number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=f'{prefix}{number}@example.com',
+                password=password,
+            )
+        return self.create(User, total, make)
+
+    def create_groups(self, total):
+        prefix = f'group{self.random.randrange(10 ** 6)}-'
+        counter = iter(range(total))
+
+        def make():
+            number = next(counter)
+            return Group(
+                title=self.fake.catch_phrase()[:200],
+                slug=f'{prefix}{number}',
+                description=self.fake.paragraph(),
+            )
+        return self.create(Group, total, make)
+
+    def create_follows(self, users, total):
+        """Подписки распределяются по пользователям поровну, авторы
+        у каждого разные, поэтому пары не повторяются."""
+        if len(users) < 2:
+            return
+        total = min(total, len(users) * (len(users) - 1))
+        per_user, extra = divmod(total, len(users))
+        follows = []
+        for number, user in enumerate(users):
+            count = per_user + (number < extra)
+            authors = [
+                author for author in self.random.sample(users, count + 1)
+                if author != user
+            ][:count]
+            follows.extend(
+                Follow(user_id=user, author_id=author) for author in authors
+            )
+            if len(follows) >= self.batch_size:
+                self.save_follows(follows)
+                follows = []
+        self.save_follows(follows)
+
+    def save_follows(self, follows):
+        with transaction.atomic():
+            Follow.objects.bulk_create(follows)
@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.constants import THUMBNAIL_WORKERS
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие миниатюры для картинок постов '
+            'в нескольких процессах')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=THUMBNAIL_WORKERS,
+            help='Количество процессов для обработки картинок'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Обработать и те картинки, миниатюры которых уже готовы'
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True).distinct()
+        names = [
+            name for name in names.iterator()
+            if options['force'] or not thumbnails.is_ready(name)
+        ]
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            results = pool.map(thumbnails.render_safely, names, chunksize=16)
+            for name, result, error in results:
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                thumbnails.store(name, *result)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано миниатюр: {done}, ошибок: {failed}'
+        ))
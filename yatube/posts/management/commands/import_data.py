@@ -0,0 +1,68 @@
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import bump
+from posts import media, transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, группы, посты, комментарии и '
+            'подписки из NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для загрузки, «-» — stdin'
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Формат файла (по умолчанию по расширению)'
+        )
+        parser.add_argument(
+            '--type', choices=transfer.TYPES,
+            help='Вид записей в CSV-файле'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей сохранять в одной транзакции'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не перестраивать ленты, счётчики и поисковый индекс'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        if file_format == 'csv' and not options['type']:
+            raise CommandError('Для CSV нужно указать --type')
+        if path == '-':
+            lines = sys.stdin
+        else:
+            lines = open(path, encoding='utf-8', newline='')
+        try:
+            if file_format == 'csv':
+                records = transfer.read_csv(lines, options['type'])
+            else:
+                records = transfer.read_ndjson(lines)
+            scopes = set()
+            totals = transfer.import_records(
+                records, options['batch_size'], scopes)
+        except transfer.TransferError as error:
+            raise CommandError(error)
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        if not options['skip_derived']:
+            media.recount()
+            for command in ('reconcile_counters', 'rebuild_timelines',
+                            'rebuild_search_index'):
+                call_command(command, stdout=self.stdout)
+        # Страницы сбрасываются после пересчёта счётчиков и лент, чтобы
+        # пересчитанные страницы уже видели их.
+        bump(*scopes)
+        self.stdout.write(self.style.SUCCESS('Загружено: ' + ', '.join(
+            f'{kind}: {total}' for kind, total in totals.items() if total
+        )))
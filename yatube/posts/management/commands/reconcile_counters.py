@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import counters
+from posts.constants import COUNTERS_CHUNK_SIZE
+from posts.models import Post
+
+User = get_user_model()
+
+
+def chunked_ids(queryset, chunk_size):
+    """Идентификаторы по возрастанию, порциями по chunk_size."""
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, подписок и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=COUNTERS_CHUNK_SIZE,
+            help='Сколько записей пересчитывать в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        users = posts = 0
+        for ids in chunked_ids(User.objects.all(), chunk_size):
+            counters.recompute_users(ids)
+            users += len(ids)
+        for ids in chunked_ids(Post.objects.all(), chunk_size):
+            counters.recompute_posts(ids)
+            posts += len(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано пользователей: {users}, постов: {posts}'
+        ))
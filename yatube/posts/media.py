@@ -0,0 +1,112 @@
+"""Счётчики ссылок на файлы картинок и удаление неиспользуемых файлов.
+
+Хранилище картинок (core.storage.ContentAddressedStorage) хранит одну
+копию одинаковых файлов, поэтому файл можно удалить, только когда на
+него не ссылается ни один пост. Счётчик в MediaBlob меняется при
+сохранении и удалении постов, а файл без ссылок удаляется вместе с его
+миниатюрами после фиксации транзакции.
+
+Удаление идёт под блокировкой строки MediaBlob: acquire, увеличивающий
+счётчик того же файла, ждёт её и после удаления строки создаёт новую.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import TEMP_PREFIX
+
+from .constants import MEDIA_GRACE_PERIOD
+from .models import MediaBlob, Post
+from .thumbnails import image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def acquire(name):
+    updated = MediaBlob.objects.filter(name=name).update(
+        references=F('references') + 1
+    )
+    if not updated:
+        blob, created = MediaBlob.objects.get_or_create(
+            name=name, defaults={'references': 1}
+        )
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(
+                references=F('references') + 1
+            )
+
+
+def release(name):
+    MediaBlob.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    transaction.on_commit(lambda: collect(name))
+
+
+def collect(name):
+    """Удаляет файл и его миниатюры, если на него не осталось ссылок.
+
+    Счётчик перечитывается под блокировкой строки, а посты с этим файлом
+    проверяются ещё раз: счётчик мог разойтись с ними.
+    """
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(
+            name=name).first()
+        if blob is None or blob.references:
+            return False
+        if Post.objects.filter(image=name).exists():
+            return False
+        blob.delete()
+        try:
+            delete_with_thumbnails(ImageFile(name, image_storage()))
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+    return True
+
+
+def recount():
+    """Пересчитывает ссылки на файлы по постам."""
+    references = dict(
+        Post.objects.exclude(image='').values('image').annotate(
+            total=Count('pk')).order_by().values_list('image', 'total')
+    )
+    with transaction.atomic():
+        blobs = {blob.name: blob for blob in MediaBlob.objects.all()}
+        for name, blob in blobs.items():
+            blob.references = references.get(name, 0)
+        MediaBlob.objects.bulk_update(blobs.values(), ['references'])
+        MediaBlob.objects.bulk_create(
+            MediaBlob(name=name, references=total)
+            for name, total in references.items() if name not in blobs
+        )
+
+
+def settled(name, grace=MEDIA_GRACE_PERIOD):
+    """Файл записан больше ``grace`` секунд назад или его уже нет.
+
+    Более новый файл может принадлежать посту, который ещё сохраняется.
+    """
+    try:
+        modified = image_storage().get_modified_time(name)
+    except OSError:
+        return True
+    return modified <= timezone.now() - timedelta(seconds=grace)
+
+
+def stored_files(directory):
+    """Имена всех файлов каталога хранилища картинок, с подкаталогами,
+    кроме недописанных временных."""
+    storage = image_storage()
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        if not name.startswith(TEMP_PREFIX):
+            yield f'{directory}/{name}'
+    for name in directories:
+        yield from stored_files(f'{directory}/{name}')
@@ -0,0 +1,91 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+CHUNK_SIZE = 1000
+
+
+def chunked_ids(queryset):
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def grouped_counts(model, field, ids):
+    return dict(
+        model.objects.filter(**{f'{field}__in': ids}).values(field)
+        .annotate(total=Count('pk')).order_by()
+        .values_list(field, 'total')
+    )
+
+
+def fill_counters(apps, schema_editor):
+    # Счётчики считаются группировкой по порциям id, а не запросами
+    # на каждую строку.
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    for ids in chunked_ids(Post.objects.all()):
+        counts = grouped_counts(Comment, 'post_id', ids)
+        Post.objects.bulk_update(
+            [Post(pk=pk, comments_count=total)
+             for pk, total in counts.items()],
+            ['comments_count'],
+        )
+    for ids in chunked_ids(User.objects.all()):
+        posts = grouped_counts(Post, 'author_id', ids)
+        followers = grouped_counts(Follow, 'author_id', ids)
+        following = grouped_counts(Follow, 'user_id', ids)
+        UserStats.objects.bulk_create(
+            UserStats(
+                user_id=user_id,
+                posts_count=posts.get(user_id, 0),
+                followers_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+            )
+            for user_id in ids
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0017_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from core.models import CreatedModel
+from core.models import AtomicSaveMixin, CreatedModel
+from core.storage import ContentAddressedStorage
 from posts.constants import MAX_POST_TEXT_LENGTH
 
 User = get_user_model()
@@ -20,7 +21,7 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class Post(AtomicSaveMixin, CreatedModel):
     text = models.TextField(verbose_name='Текст',
                             help_text='Введите текст поста')
     author = models.ForeignKey(
@@ -42,11 +43,26 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=('-created', '-id'),
+                         name='post_created_idx'),
+            models.Index(fields=('author', '-created', '-id'),
+                         name='post_author_created_idx'),
+            models.Index(fields=('group', '-created', '-id'),
+                         name='post_group_created_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -54,7 +70,7 @@ class Post(CreatedModel):
         return self.text[:MAX_POST_TEXT_LENGTH]
 
 
-class Comment(CreatedModel):
+class Comment(AtomicSaveMixin, CreatedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -72,6 +88,10 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created', )
+        indexes = [
+            models.Index(fields=('post', '-created'),
+                         name='comment_post_created_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -79,7 +99,7 @@ class Comment(CreatedModel):
         return self.text
 
 
-class Follow(models.Model):
+class Follow(AtomicSaveMixin, models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -105,3 +125,101 @@ class Follow(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} подписан на {self.author}'
+
+
+class Timeline(models.Model):
+    """Отметка о том, что лента подписок пользователя материализована."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    built = models.DateTimeField('Дата построения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Лента'
+        verbose_name_plural = 'Ленты'
+
+    def __str__(self) -> str:
+        return f'Лента {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты: пост автора, на которого
+    подписан пользователь."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-created', '-post'),
+                name='timeline_user_created_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.post}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые при записи."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self) -> str:
+        return f'Статистика {self.user}'
+
+
+class MediaBlob(models.Model):
+    """Файл хранилища картинок и число постов, которые на него ссылаются."""
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self) -> str:
+        return self.name
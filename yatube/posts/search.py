@@ -0,0 +1,117 @@
+"""Полнотекстовый поиск по текстам постов (SQLite FTS5).
+
+Индекс — виртуальная таблица ``posts_post_fts``, где rowid совпадает с
+id поста. Она обновляется сигналами при сохранении и удалении постов и
+перестраивается командой ``rebuild_search_index``. На других СУБД
+поиск отключён: ``is_supported()`` возвращает False.
+"""
+import re
+
+from django.db import connection, models
+
+from core.paginator import CursorPaginator
+
+from .models import Post
+
+TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(text):
+    """Запрос FTS5 из пользовательского ввода: все слова как префиксы.
+
+    Спецсимволы синтаксиса FTS5 отбрасываются, поэтому запрос всегда
+    корректен. Пустая строка означает, что искать нечего.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def remove_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def matching_ids_sql(query):
+    """Подзапрос id постов, подходящих под запрос, для ``pk__in``."""
+    return (
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+        [match_query(query)]
+    )
+
+
+def ranked_ids(query, limit, values=None, reverse=False, offset=0):
+    """Пары (rank, id) по релевантности (bm25), затем по id.
+
+    ``values`` — ключ (rank, id), после которого начинается выборка.
+    """
+    after = ''
+    params = [match_query(query)]
+    if values is not None:
+        rank, post_id = values
+        sign = '<' if reverse else '>'
+        after = f'WHERE rank {sign} %s OR (rank = %s AND id {sign} %s)'
+        params += [rank, rank, post_id]
+    direction = 'DESC' if reverse else 'ASC'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rank, id FROM ('
+            f'SELECT rank, rowid AS id FROM {TABLE} WHERE {TABLE} MATCH %s'
+            f') {after} ORDER BY rank {direction}, id {direction} '
+            f'LIMIT %s OFFSET %s',
+            params + [limit, offset]
+        )
+        return cursor.fetchall()
+
+
+class SearchPaginator(CursorPaginator):
+    """Keyset-пагинация результатов поиска по ключу (rank, id).
+
+    Постам страницы добавляется атрибут ``rank``.
+    """
+
+    def __init__(self, query, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, ordering=('rank', 'pk'),
+                         **kwargs)
+        self.query = query
+
+    def _key_field(self, name):
+        if name == 'rank':
+            return models.FloatField()
+        return super()._key_field(name)
+
+    def _rows(self, limit, values=None, reverse=False, offset=0):
+        if not match_query(self.query) or not is_supported():
+            return []
+        ranked = ranked_ids(self.query, limit, values, reverse, offset)
+        posts = self.object_list.in_bulk([post_id for _, post_id in ranked])
+        rows = []
+        for rank, post_id in ranked:
+            if post_id in posts:
+                posts[post_id].rank = rank
+                rows.append(posts[post_id])
+        return rows
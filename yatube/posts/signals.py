@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (cache_scopes, counters, media, search, thumbnails,
+               timeline)
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.create_empty(instance)
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+        counters.change_user(instance.author_id, posts_count=1)
+
+
+@receiver(post_save, sender=Post)
+def generate_thumbnails(sender, instance, raw=False, **kwargs):
+    if instance.image and not raw:
+        thumbnails.enqueue(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def track_image_references(sender, instance, raw=False, **kwargs):
+    old_image = getattr(instance, '_old_image', '')
+    if raw or (instance.image.name or '') == (old_image or ''):
+        return
+    if instance.image:
+        media.acquire(instance.image.name)
+    if old_image:
+        media.release(old_image)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, raw=False, **kwargs):
+    if not raw and search.is_supported():
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, posts_count=-1)
+    if instance.image:
+        media.release(instance.image.name)
+    if search.is_supported():
+        search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.add_author(instance.user_id, instance.author_id)
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+    counters.change_user(instance.author_id, followers_count=-1)
+    counters.change_user(instance.user_id, following_count=-1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_post(sender, instance, raw=False, **kwargs):
+    instance._old_image = ''
+    if instance.pk and not raw:
+        old = Post.objects.filter(pk=instance.pk).values(
+            'group__slug', 'image').first()
+        if old and old['group__slug']:
+            cache_scopes.group_changed(old['group__slug'])
+        if old:
+            instance._old_image = old['image']
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_scopes.post_changed(instance)
+
+
+@receiver(pre_save, sender=Group)
+def invalidate_old_group(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        old_slug = Group.objects.filter(pk=instance.pk).values_list(
+            'slug', flat=True).first()
+        if old_slug:
+            cache_scopes.group_changed(old_slug)
+            cache_scopes.group_edited(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_scopes.group_changed(instance.slug)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_scopes.comment_changed(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_scopes.follow_changed(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_scopes.user_changed(instance)
@@ -0,0 +1,70 @@
+import hashlib
+
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails
+from posts.constants import CACHE_TTL
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/posts.html'
+CARD_KEY = 'post-card:{}:{}:{}'
+RENDERED_CARDS = 'post_cards'
+
+
+def card_key(post):
+    """Ключ карточки меняется при правке поста и при смене имени автора,
+    которое выводится в карточке."""
+    author = post.author
+    author_version = hashlib.md5('{}:{}:{}'.format(
+        author.username, author.first_name, author.last_name
+    ).encode()).hexdigest()
+    return CARD_KEY.format(post.pk, post.updated.timestamp(), author_version)
+
+
+def render_cards(posts):
+    """Карточки постов: одна выборка из кеша на все посты,
+    отрисовываются только отсутствующие в нём.
+
+    Карточки, для которых миниатюра ещё не готова, не кешируются, чтобы
+    миниатюра появилась на странице сразу после генерации.
+    """
+    keys = {post.pk: card_key(post) for post in posts}
+    cards = {}
+    found = cache.get_many(keys.values())
+    missed = [post for post in posts if keys[post.pk] not in found]
+    ready = thumbnails.resolve(missed) if missed else {}
+    rendered = {}
+    for post in posts:
+        key = keys[post.pk]
+        if key not in found:
+            thumbnail = ready.get(post.pk)
+            found[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'thumbnail': thumbnail}
+            )
+            if thumbnail or not post.image:
+                rendered[key] = found[key]
+        cards[post.pk] = found[key]
+    if rendered:
+        cache.set_many(rendered, CACHE_TTL)
+    return cards
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка поста из includes/posts.html.
+
+    При первом вызове на странице карточки всех постов ``page_obj``
+    загружаются из кеша одним запросом.
+    """
+    cards = context.render_context.setdefault(RENDERED_CARDS, {})
+    if post.pk not in cards:
+        page = context.get('page_obj')
+        posts = [item for item in page or () if item.pk not in cards]
+        if post not in posts:
+            posts.append(post)
+        cards.update(render_cards(posts))
+    return mark_safe(cards[post.pk])
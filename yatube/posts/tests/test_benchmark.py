@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'generate_data', users=6, groups=2, posts=30, comments=20,
+            follows=10, seed=1, batch_size=7, stdout=StringIO()
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_data_creates_dataset(self):
+        """Генератор создаёт заданное число объектов и производные данные."""
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertEqual(Follow.objects.count(), 10)
+        self.assertEqual(
+            sum(user.stats.posts_count for user in User.objects.all()), 30
+        )
+
+    def test_benchmark_writes_json(self):
+        """Замеры сохраняются в JSON для каждого адреса posts/urls.py."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark', requests=3, warmup=1, output=output,
+                         stderr=StringIO())
+            with open(output, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(report['meta']['dataset']['posts'], 30)
+        results = report['results']
+        self.assertTrue(results['add_comment']['skipped'])
+        for name in ('index', 'group_list', 'profile', 'post_detail',
+                     'follow_index', 'search'):
+            with self.subTest(name=name):
+                self.assertEqual(results[name]['status'], [200])
+                self.assertLessEqual(
+                    results[name]['p50_ms'], results[name]['p95_ms'])
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.cache import generations
+
+from .. import cache_scopes
+from ..models import Comment, Group, Post, User
+from ..templatetags.post_cards import render_cards
+
+
+class VersionedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_page_is_cached_until_data_changes(self):
+        """Страница берётся из кеша, пока данные не изменились."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        self.assertContains(self.client.get(url), 'Первый пост')
+
+    def test_new_post_invalidates_listings(self):
+        """Новый пост сразу виден на главной, в группе и в профиле."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Второй пост')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Второй пост')
+
+    def test_edit_and_comment_invalidate_post_detail(self):
+        """Правка поста и новый комментарий сбрасывают кеш страницы поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(self.client.get(url), 'Исправленный пост')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий')
+        self.assertContains(self.client.get(url), 'Свежий комментарий')
+
+    def test_group_edit_invalidates_author_pages(self):
+        """Новые адрес и название группы сразу видны в профиле и ленте
+        её авторов."""
+        profile = reverse('posts:profile', kwargs={'username': 'auth'})
+        feed = reverse('posts:profile_feed', args=('auth', 'atom'))
+        self.assertContains(self.client.get(profile), '/group/test/')
+        self.assertContains(self.client.get(feed), 'Тестовая группа')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.title = 'Переименованная группа'
+        group.save()
+        self.assertContains(self.client.get(profile), '/group/renamed/')
+        self.assertContains(self.client.get(feed), 'Переименованная группа')
+
+    def test_moving_post_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает кеш прежней группы."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.client.get(url)
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание')
+        self.post.group = other
+        self.post.save()
+        self.assertNotContains(self.client.get(url), 'Первый пост')
+
+    def test_page_is_not_shared_between_users(self):
+        """Страница, закешированная для пользователя, не достаётся
+        анониму, и наоборот."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        user_client = Client()
+        user_client.force_login(self.author)
+        self.assertContains(user_client.get(url), 'csrfmiddlewaretoken')
+        response = self.client.get(url)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, reverse('users:logout'))
+        self.assertContains(user_client.get(url), 'csrfmiddlewaretoken')
+
+
+class CommitInvalidationTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth')
+
+    def test_scopes_bumped_again_after_commit(self):
+        """После коммита поколение увеличивается ещё раз: страница,
+        пересчитанная внутри транзакции, устаревает."""
+        with transaction.atomic():
+            Post.objects.create(author=self.author, text='Пост')
+            inside = generations(cache_scopes.ALL_POSTS)
+        self.assertGreater(generations(cache_scopes.ALL_POSTS), inside)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_rendered_once_and_shared(self):
+        """Карточки отрисовываются один раз и берутся из кеша
+        на любой странице."""
+        with mock.patch('posts.templatetags.post_cards.render_to_string',
+                        wraps=render_to_string) as render:
+            self.client.get(reverse('posts:index'))
+            self.assertEqual(render.call_count, len(self.posts))
+            self.client.get(
+                reverse('posts:profile', kwargs={'username': 'auth'}))
+            self.assertEqual(render.call_count, len(self.posts))
+
+    def test_page_cards_fetched_with_one_get_many(self):
+        render_cards(self.posts)
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many:
+            cards = render_cards(self.posts)
+        get_many.assert_called_once()
+        self.assertEqual(set(cards), {post.pk for post in self.posts})
+
+    def test_edit_changes_card(self):
+        """После правки поста карточка отрисовывается заново."""
+        post = self.posts[0]
+        render_cards([post])
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertIn('Исправленный текст', render_cards([post])[post.pk])
+
+    def test_author_rename_changes_card(self):
+        """После смены имени автора карточка отрисовывается заново."""
+        post = self.posts[0]
+        render_cards([post])
+        post.author.first_name = 'Новое'
+        post.author.last_name = 'Имя'
+        post.author.save()
+        post = Post.objects.select_related('author').get(pk=post.pk)
+        self.assertIn('Новое Имя', render_cards([post])[post.pk])
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_etag_returns_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без отрисовки
+        шаблона."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        """Last-Modified тоже позволяет получить 304."""
+        url = reverse('posts:group_list', args=('group',))
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        """Новый комментарий меняет ETag страницы поста, новый пост —
+        ETag профиля автора."""
+        pages = {
+            'post': reverse('posts:post_detail', args=(self.post.pk,)),
+            'profile': reverse('posts:profile', args=('auth',)),
+        }
+        etags = {name: self.client.get(url)['ETag']
+                 for name, url in pages.items()}
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        for name, url in pages.items():
+            with self.subTest(page=name):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etags[name])
+
+    def test_etag_depends_on_user(self):
+        """Страница для авторизованного пользователя не совпадает со
+        страницей для гостя."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
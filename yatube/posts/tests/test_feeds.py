@@ -0,0 +1,90 @@
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..constants import FEED_SIZE
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в группе')
+        Post.objects.create(author=cls.author, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_xml(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content) if (
+            response.streaming) else response.content
+        return response, ElementTree.fromstring(content)
+
+    def test_index_atom_feed_is_streamed(self):
+        """Общая лента Atom отдаётся потоком и содержит все посты."""
+        response, feed = self.get_xml(
+            reverse('posts:index_feed', args=('atom',)))
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'))
+        titles = [entry.find(f'{ATOM}title').text
+                  for entry in feed.iter(f'{ATOM}entry')]
+        self.assertEqual(titles, ['Пост без группы', 'Пост в группе'])
+
+    def test_group_and_profile_rss(self):
+        """Ленты RSS группы и автора содержат только их посты."""
+        _, feed = self.get_xml(
+            reverse('posts:group_feed', args=('group', 'rss')))
+        self.assertEqual(
+            [item.find('title').text for item in feed.iter('item')],
+            ['Пост в группе'])
+        _, feed = self.get_xml(
+            reverse('posts:profile_feed', args=('auth', 'rss')))
+        self.assertEqual(len(list(feed.iter('item'))), 2)
+
+    def test_unknown_feed(self):
+        """Несуществующий формат, группа или автор — 404."""
+        for url in (reverse('posts:index_feed', args=('json',)),
+                    reverse('posts:group_feed', args=('nope', 'atom')),
+                    reverse('posts:profile_feed', args=('nobody', 'rss'))):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_next_page_by_cursor(self):
+        """Лента длиннее FEED_SIZE продолжается по ссылке rel=next."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(FEED_SIZE)
+        )
+        _, feed = self.get_xml(reverse('posts:index_feed', args=('atom',)))
+        self.assertEqual(len(list(feed.iter(f'{ATOM}entry'))), FEED_SIZE)
+        next_link, = [link.get('href') for link in feed.iter(f'{ATOM}link')
+                      if link.get('rel') == 'next']
+        _, feed = self.get_xml(next_link)
+        self.assertEqual(len(list(feed.iter(f'{ATOM}entry'))), 2)
+
+    def test_body_cached_until_posts_change(self):
+        """Тело ленты берётся из кеша, пока посты не изменились;
+        совпавший ETag даёт 304."""
+        url = reverse('posts:index_feed', args=('atom',))
+        self.get_xml(url)
+        with self.assertNumQueries(0):
+            response, _ = self.get_xml(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            .status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        _, feed = self.get_xml(url)
+        self.assertIn('Новый пост', ElementTree.tostring(
+            feed, encoding='unicode'))
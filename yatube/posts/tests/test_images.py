@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..constants import POST_IMAGE_MAX_DIMENSION
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+EXIF_ORIENTATION = 0x0112
+
+
+def jpeg_upload(size, orientation=None, image_format='JPEG'):
+    image = Image.new('RGB', size, color=(200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'Phone maker'
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    content = BytesIO()
+    image.save(content, image_format, exif=exif.tobytes())
+    return SimpleUploadedFile('photo.jpg', content.getvalue(),
+                              content_type='image/jpeg')
+
+
+def png_upload(size, mode):
+    image = Image.new(mode, size, color=1)
+    content = BytesIO()
+    image.save(content, 'PNG')
+    return SimpleUploadedFile('scan.png', content.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageIngestionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_large_image_downscaled_rotated_and_stripped(self):
+        """Картинка уменьшается, поворачивается по EXIF и теряет EXIF."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Фото',
+            'image': jpeg_upload((3000, 1200), orientation=6),
+        })
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(
+                image.size, (round(1200 * POST_IMAGE_MAX_DIMENSION / 3000),
+                             POST_IMAGE_MAX_DIMENSION)
+            )
+            self.assertNotIn('exif', image.info)
+
+    def test_mpo_saved_as_jpeg(self):
+        """Фотография в формате MPO сохраняется как JPEG."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Фото',
+            'image': jpeg_upload((3000, 1200), image_format='MPO'),
+        })
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(max(image.size), POST_IMAGE_MAX_DIMENSION)
+
+    def test_large_bilevel_and_palette_images_downscaled(self):
+        """Однобитная и палитровая картинки уменьшаются без ошибки."""
+        for mode in ('1', 'P'):
+            with self.subTest(mode=mode):
+                response = self.client.post(reverse('posts:post_create'), {
+                    'text': 'Скан', 'image': png_upload((5000, 50), mode),
+                })
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+                post = Post.objects.latest('pk')
+                with Image.open(post.image.path) as image:
+                    self.assertEqual(image.format, 'PNG')
+                    self.assertEqual(max(image.size),
+                                     POST_IMAGE_MAX_DIMENSION)
+
+    def test_unprocessable_image_rejected(self):
+        """Ошибка Pillow при обработке показывается как ошибка формы."""
+        with mock.patch('posts.images.ImageOps.exif_transpose',
+                        side_effect=OSError('broken data stream')):
+            response = self.client.post(reverse('posts:post_create'), {
+                'text': 'Фото', 'image': jpeg_upload((300, 200)),
+            })
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Не удалось обработать картинку.')
+
+    def test_original_kept_when_format_cannot_be_written(self):
+        """Если Pillow не может записать формат, сохраняется оригинал."""
+        upload = jpeg_upload((300, 200))
+        original = upload.read()
+        upload.seek(0)
+        with mock.patch.dict('posts.images.SAVE_FORMATS',
+                             {'JPEG': 'UNKNOWN'}):
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'Фото', 'image': upload,
+            })
+        with Post.objects.get().image.open() as stored:
+            self.assertEqual(stored.read(), original)
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_image_rejected(self):
+        """Слишком большой файл отклоняется с понятной ошибкой."""
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Фото',
+            'image': jpeg_upload((500, 500)),
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Размер картинки не должен превышать 1,0\xa0КБ.'
+        )
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ListingIndexTest(TestCase):
+    """Основные запросы страниц читают посты и комментарии по индексу
+    и не сортируют результат во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def ordered_queries(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+            and 'ORDER BY' in query['sql']
+        ]
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def test_listing_queries_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN проверяется только на SQLite')
+        pages = {
+            reverse('posts:index'): 'posts_post',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+            'posts_post',
+            reverse('posts:profile', kwargs={'username': 'auth'}):
+            'posts_post',
+            reverse('posts:follow_index'): 'posts_post',
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}):
+            'posts_comment',
+        }
+        for url, table in pages.items():
+            queries = self.ordered_queries(url, table)
+            self.assertTrue(queries, url)
+            for sql in queries:
+                with self.subTest(url=url, sql=sql):
+                    plan = self.query_plan(sql)
+                    self.assertIn('USING', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
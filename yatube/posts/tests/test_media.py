@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.storage import TEMP_PREFIX
+
+from .. import media
+from ..constants import MEDIA_GRACE_PERIOD
+from ..models import MediaBlob, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def gif(name='small.gif', content=SMALL_GIF):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+def backdate(path):
+    past = time.time() - MEDIA_GRACE_PERIOD - 1
+    os.utime(path, (past, past))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedMediaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, image):
+        return Post.objects.create(author=self.user, text='Пост', image=image)
+
+    def test_identical_uploads_share_sharded_file(self):
+        """Одинаковые картинки хранятся одним файлом в подкаталогах хеша."""
+        first = self.create_post(gif('first.gif'))
+        second = self.create_post(gif('second.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        folder, first_shard, second_shard, name = first.image.name.split('/')
+        self.assertEqual(folder, 'posts')
+        self.assertTrue(name.startswith(first_shard + second_shard))
+        self.assertTrue(name.endswith('.gif'))
+        self.assertEqual(
+            MediaBlob.objects.get(name=first.image.name).references, 2
+        )
+
+    def test_unreferenced_file_collected(self):
+        """Файл удаляется, когда на него не остаётся ссылок."""
+        first = self.create_post(gif())
+        second = self.create_post(gif())
+        path = first.image.path
+        first.delete()
+        self.assertFalse(media.collect(second.image.name))
+        self.assertTrue(os.path.exists(path))
+        second.image = gif('other.gif', SMALL_GIF + b'\x00')
+        second.save()
+        self.assertTrue(media.collect(first.image.name))
+        self.assertFalse(os.path.exists(path))
+
+    def test_collect_media_command_removes_orphans(self):
+        """Команда удаляет файлы, на которые не ссылается ни один пост."""
+        post = self.create_post(gif())
+        path = post.image.path
+        Post.objects.filter(pk=post.pk).update(image='')
+        backdate(path)
+        call_command('collect_media', stdout=StringIO())
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_collect_media_keeps_fresh_and_temporary_files(self):
+        """Недавние файлы и недописанные временные файлы не удаляются:
+        их пост может быть ещё не сохранён."""
+        post = self.create_post(gif())
+        path = post.image.path
+        temp_path = os.path.join(os.path.dirname(path), TEMP_PREFIX + 'x')
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(SMALL_GIF)
+        backdate(temp_path)
+        Post.objects.filter(pk=post.pk).update(image='')
+        call_command('collect_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.exists(temp_path))
+
+    def test_collect_rechecks_posts(self):
+        """Файл поста не удаляется, даже если счётчик ссылок обнулён."""
+        post = self.create_post(gif())
+        MediaBlob.objects.update(references=0)
+        self.assertFalse(media.collect(post.image.name))
+        self.assertTrue(os.path.exists(post.image.path))
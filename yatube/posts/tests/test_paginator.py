@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import MAX_PAGE_NUMBER, CursorPaginator, encode_cursor
+from posts.constants import POST_OBJ
+
+from ..models import Follow, Group, Post, User
+
+POSTS_COUNT = 25
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(POSTS_COUNT):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+        cls.expected = list(Post.objects.order_by('-created', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def walk(self, url):
+        """Проходит ленту по курсорам «Следующая» до конца."""
+        posts = []
+        params = {}
+        while True:
+            response = self.client.get(url, params)
+            page_obj = response.context['page_obj']
+            posts.extend(page_obj)
+            if not page_obj.has_next():
+                return posts, page_obj
+            params = {'cursor': page_obj.next_cursor}
+
+    def test_cursor_walk_covers_all_pages(self):
+        """Курсоры проходят все посты без пропусков и повторов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                posts, _ = self.walk(url)
+                self.assertEqual(posts, self.expected)
+
+    def test_previous_cursor(self):
+        """Курсор «Предыдущая» возвращает предыдущую страницу."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_page_number_compatibility(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        page_obj = self.client.get(url, {'page': 2}).context['page_obj']
+        self.assertEqual(list(page_obj),
+                         self.expected[POST_OBJ:POST_OBJ * 2])
+        self.assertTrue(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
+    def test_deep_page_number_not_found(self):
+        """Номер дальше MAX_PAGE_NUMBER не превращается в большой OFFSET
+        и не подменяется другой страницей."""
+        paginator = CursorPaginator(Post.objects.all(), 1)
+        with self.assertRaises(EmptyPage):
+            paginator.get_page(MAX_PAGE_NUMBER + 1)
+        url = reverse('posts:index')
+        response = self.client.get(url, {'page': MAX_PAGE_NUMBER + 1})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_forged_cursor_returns_first_page(self):
+        """Курсор с негодными значениями ключа не ломает страницу."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=пост',
+        )
+        cursors = (['n', 'garbage', 4], ['n', None, 'x'], ['n', 'x'],
+                   ['n', 1.5, 'x'])
+        for url in urls:
+            for values in cursors:
+                with self.subTest(url=url, values=values):
+                    response = self.client.get(url, {
+                        'cursor': encode_cursor(values[0], values[1:])})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_invalid_cursor_returns_first_page(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        page_obj = self.client.get(
+            url, {'cursor': 'garbage'}).context['page_obj']
+        self.assertEqual(list(page_obj), self.expected[:POST_OBJ])
+
+    def test_no_count_queries(self):
+        """Пагинация не выполняет COUNT(*)."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        cursor = self.client.get(url).context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'cursor': cursor})
+        self.assertFalse(any(
+            'COUNT(' in query['sql'].upper() for query in queries))
@@ -0,0 +1,149 @@
+import inspect
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.budget import QueryBudgetExceeded, query_budget
+
+from .. import views
+from ..models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def gif(name, salt):
+    return SimpleUploadedFile(name, SMALL_GIF + salt.encode(),
+                              content_type='image/gif')
+
+
+class QueryBudgetTest(TestCase):
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_exceeding_budget_raises(self):
+        """Превышение бюджета в тестах приводит к ошибке."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                for _ in range(2):
+                    connection.cursor().execute('SELECT 1')
+
+    def test_exceeding_budget_logged(self):
+        """Без QUERY_BUDGET_RAISE превышение только пишется в лог."""
+        with self.assertLogs('core.budget', 'WARNING'):
+            with query_budget(0, name='block'):
+                connection.cursor().execute('SELECT 1')
+
+    def test_every_view_has_budget(self):
+        """Бюджет объявлен у каждого представления posts.views."""
+        for name, view in inspect.getmembers(views, inspect.isfunction):
+            if view.__module__ == views.__name__ and 'request' in (
+                    inspect.signature(view).parameters) and (
+                    name != 'paginate_posts'):
+                with self.subTest(view=name):
+                    self.assertTrue(hasattr(view, 'query_budget'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, QUERY_BUDGET_RAISE=True)
+class ViewQueryBudgetTest(TestCase):
+    """Представления укладываются в бюджет на полной странице постов
+    разных авторов, с картинками и комментариями."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(12)
+        ]
+        for number in range(15):
+            author = authors[number % len(authors)]
+            post = Post.objects.create(
+                author=author, group=cls.group, text=f'Пост {number}',
+                image=gif(f'{number}.gif', str(number)),
+            )
+            for commenter in authors[:5]:
+                Comment.objects.create(
+                    post=post, author=commenter, text='Комментарий')
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.own_post = Post.objects.create(author=cls.user, text='Свой пост')
+        cls.post = post
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_read_views(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:search') + '?q=пост',
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=('author1',)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('posts:follow_index'),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', args=(self.own_post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_write_views(self):
+        """Записывающие представления укладываются в бюджет и доводят
+        запись до конца."""
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Новый', 'group': self.group.pk,
+            'image': gif('new.gif', 'new'),
+        })
+        self.assertRedirects(
+            response, reverse('posts:profile', args=('reader',)))
+        self.assertTrue(Post.objects.filter(
+            author=self.user, group=self.group, text='Новый').exists())
+        response = self.client.post(
+            reverse('posts:post_edit', args=(self.own_post.pk,)),
+            {'text': 'Изменён', 'image': gif('edit.gif', 'edit')},
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.own_post.pk,)))
+        self.own_post.refresh_from_db()
+        self.assertEqual(self.own_post.text, 'Изменён')
+        self.assertTrue(self.own_post.image)
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Ещё'},
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertTrue(Comment.objects.filter(
+            post=self.post, author=self.user, text='Ещё').exists())
+        follow = Follow.objects.filter(
+            user=self.user, author__username='author1')
+        response = self.client.get(
+            reverse('posts:profile_unfollow', args=('author1',)))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(follow.exists())
+        response = self.client.get(
+            reverse('posts:profile_follow', args=('author1',)))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(follow.exists())
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+
+from ..models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def route(self, state):
+        token = routers.activate(state)
+        self.addCleanup(routers.deactivate, token)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Команды и обработчики очереди читают из основной базы."""
+        self.assertEqual(Post.objects.all().db, 'default')
+
+    def test_reads_in_request_use_replica(self):
+        """В запросе без записей чтения идут на реплику."""
+        self.route(routers.RoutingState())
+        self.assertEqual(Post.objects.all().db, 'replica')
+
+    def test_write_pins_request_to_primary(self):
+        """После записи запрос читает только из основной базы."""
+        state = routers.RoutingState()
+        self.route(state)
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertTrue(state.wrote)
+        self.assertEqual(Post.objects.all().db, 'default')
+
+    def test_primary_block_reads_from_primary(self):
+        """Внутри primary() чтения идут в основную базу, после — снова
+        на реплику, если в блоке не было записи."""
+        state = routers.RoutingState()
+        self.route(state)
+        with routers.primary():
+            self.assertEqual(Post.objects.all().db, 'default')
+        self.assertEqual(Post.objects.all().db, 'replica')
+        with routers.primary():
+            router.db_for_write(Post)
+        self.assertEqual(Post.objects.all().db, 'default')
+
+    def test_migrations_only_on_primary(self):
+        """Миграции применяются только к основной базе."""
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPinningMiddlewareTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.client.force_login(self.reader)
+
+    def replica_queries(self, url, table=''):
+        with CaptureQueriesContext(connections['replica']) as captured:
+            self.client.get(url)
+        return len([query for query in captured.captured_queries
+                    if table in query['sql']])
+
+    def test_read_only_request_uses_replica(self):
+        """Просмотр страниц читает с реплики и не закрепляет
+        пользователя за основной базой."""
+        self.assertGreater(
+            self.replica_queries(reverse('posts:follow_index')), 0)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, self.client.cookies)
+
+    def test_cached_pages_rendered_from_primary(self):
+        """Страницы и ленты, которые попадут в кеш, строятся по основной
+        базе: отстающая реплика не попадает в новое поколение кеша."""
+        for url in (reverse('posts:post_detail', args=(self.post.pk,)),
+                    reverse('posts:index'),
+                    reverse('posts:index_feed', args=('rss',))):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.replica_queries(url, Post._meta.db_table), 0)
+
+    def test_follow_pins_next_requests_to_primary(self):
+        """После подписки следующие запросы читают из основной базы."""
+        response = self.client.get(
+            reverse('posts:profile_follow', args=('auth',)))
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertEqual(self.replica_queries(reverse('posts:follow_index')),
+                         0)
+
+    def test_comment_sets_pin_cookie(self):
+        """Комментарий тоже закрепляет пользователя за основной базой."""
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Комментарий'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
@@ -0,0 +1,79 @@
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post, User
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.cat = Post.objects.create(
+            author=cls.author, text='Котики спят на диване')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кот и кошка. Коты повсюду, коты!')
+        cls.dog = Post.objects.create(author=cls.author, text='Собака лает')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def test_search_finds_ranked_posts(self):
+        """Поиск находит посты по началу слова, сначала релевантные."""
+        response = self.search('кот')
+        self.assertEqual(
+            list(response.context['posts']), [self.cats, self.cat]
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.dog.text = 'Собака и кот'
+        self.dog.save()
+        self.assertIn(self.dog, self.search('кот').context['posts'])
+        self.dog.delete()
+        cache.clear()
+        self.assertNotIn(self.dog, self.search('кот').context['posts'])
+
+    def test_search_paginated_by_cursor(self):
+        """Результаты листаются курсором в порядке релевантности."""
+        paginator = search.SearchPaginator('кот', Post.objects.all(), 1)
+        first = paginator.page()
+        second = paginator.page(cursor=first.next_cursor)
+        self.assertEqual(list(first), [self.cats])
+        self.assertEqual(list(second), [self.cat])
+        self.assertFalse(second.has_next())
+        previous = paginator.page(cursor=second.previous_cursor)
+        self.assertEqual(list(previous), [self.cats])
+
+    def test_query_syntax_is_escaped(self):
+        """Спецсимволы FTS5 в запросе не приводят к ошибке."""
+        response = self.search('кот" OR (NEAR*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.search('"*').context['posts']), [])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        request = RequestFactory().get('/admin/posts/post/')
+        request.user = self.admin
+        model_admin = site._registry[Post]
+        queryset, distinct = model_admin.get_search_results(
+            request, Post.objects.all(), 'кошка')
+        self.assertEqual(list(queryset), [self.cats])
+        self.assertIn(search.TABLE, str(queryset.query))
+
+    def test_rebuild(self):
+        """Перестроение индекса восстанавливает все посты."""
+        search.remove_post(self.cat.pk)
+        self.assertEqual(search.rebuild(), Post.objects.count())
+        self.assertIn(self.cat, self.search('диван').context['posts'])
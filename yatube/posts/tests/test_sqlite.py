@@ -0,0 +1,42 @@
+import json
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from core.db import configure
+
+
+class SQLitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        """PRAGMA из настроек выполняются при открытии соединения."""
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+
+    def test_file_database_switches_to_wal(self):
+        """База в файле переходит в режим WAL."""
+        with tempfile.TemporaryDirectory() as directory:
+            raw = sqlite3.connect(os.path.join(directory, 'db.sqlite3'))
+            configure(raw, {'journal_mode': 'WAL'})
+            mode, = raw.execute('PRAGMA journal_mode').fetchone()
+            raw.close()
+        self.assertEqual(mode, 'wal')
+
+    def test_benchmark_command(self):
+        """Команда сравнивает оба профиля и сообщает число операций."""
+        output = StringIO()
+        call_command('benchmark_sqlite', readers=1, writers=1,
+                     duration=0.2, rows=100, stdout=output, stderr=StringIO())
+        results = json.loads(output.getvalue())['results']
+        self.assertEqual(set(results), {'default', 'production'})
+        self.assertGreater(results['production']['reads_per_s'], 0)
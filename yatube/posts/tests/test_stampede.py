@@ -0,0 +1,128 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.cache import LOCK_KEY, get_or_compute, page_key
+
+from ..models import Post, User
+
+
+class GetOrComputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def compute(self, value='new'):
+        self.calls += 1
+        return value
+
+    def prepare(self, version, expires_in):
+        self.calls = 0
+        get_or_compute('key', lambda: 'old', 60, version=version)
+        entry = cache.get('key')
+        entry['expires'] = time.time() + expires_in
+        cache.set('key', entry)
+
+    def test_fresh_value_is_not_recomputed(self):
+        """Свежее значение берётся из кеша."""
+        self.prepare(1, 60)
+        value = get_or_compute('key', self.compute, 60, version=1, beta=0)
+        self.assertEqual((value, self.calls), ('old', 0))
+
+    def test_stale_value_served_while_other_request_recomputes(self):
+        """Пока пересчитывает другой запрос, отдаётся прежнее значение —
+        и для истёкшего, и для устаревшего по поколению."""
+        for version, expires_in in ((1, -1), (2, 60)):
+            with self.subTest(version=version):
+                self.prepare(1, expires_in)
+                cache.add(LOCK_KEY.format('key'), 'other', 10)
+                value = get_or_compute('key', self.compute, 60,
+                                       version=version, beta=0)
+                self.assertEqual((value, self.calls), ('old', 0))
+
+    def test_lock_holder_recomputes(self):
+        """Запрос, получивший блокировку, пересчитывает и снимает её."""
+        self.prepare(1, -1)
+        value = get_or_compute('key', self.compute, 60, version=1, beta=0)
+        self.assertEqual((value, self.calls), ('new', 1))
+        self.assertIsNone(cache.get(LOCK_KEY.format('key')))
+
+    def test_early_expiration(self):
+        """Долгий пересчёт незадолго до истечения запускается заранее."""
+        self.prepare(1, 1)
+        entry = cache.get('key')
+        entry['delta'] = 10 ** 6
+        cache.set('key', entry)
+        get_or_compute('key', self.compute, 60, version=1, beta=1)
+        self.assertEqual(self.calls, 1)
+
+
+class SingleFlightTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи по одному ключу считают значение один
+        раз, остальные дожидаются результата."""
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        def request():
+            results.append(get_or_compute('key', compute, 60, version=1))
+
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+
+class CachedPageUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_page_cached_per_user(self):
+        """Авторизованный пользователь не получает страницу гостя из
+        кеша."""
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Пост')
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse('posts:index')), 'Выйти')
+
+
+class StalePageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stale_page_sent_without_validators(self):
+        """Прежняя версия страницы, отданная на время пересчёта, не
+        получает ETag и Last-Modified текущего поколения."""
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Первый пост')
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(author=user, text='Второй пост')
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        lock = LOCK_KEY.format(page_key(request, 'index'))
+        cache.add(lock, 'other', 10)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Второй пост')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        cache.delete(lock)
+        response = self.client.get(url)
+        self.assertContains(response, 'Второй пост')
+        self.assertTrue(response.has_header('ETag'))
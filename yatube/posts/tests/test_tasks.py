@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+CALLS = []
+
+
+@tasks.task(max_attempts=2)
+def failing(value):
+    CALLS.append(value)
+    raise ValueError(value)
+
+
+@tasks.task()
+def succeeding(value):
+    CALLS.append(value)
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_task_runs_and_is_removed(self):
+        """Выполненная задача удаляется из очереди."""
+        succeeding.delay(1)
+        self.assertTrue(tasks.run_next('test'))
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(tasks.run_next('test'))
+
+    def test_claimed_task_not_given_to_other_worker(self):
+        """Задачу, взятую в работу, не получает другой обработчик."""
+        succeeding.delay(1)
+        self.assertIsNotNone(tasks.claim('first'))
+        self.assertIsNone(tasks.claim('second'))
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после последней попытки
+        помечается как FAILED."""
+        failing.delay('boom')
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_next('test')
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.QUEUED)
+        self.assertGreater(task_row.run_at, timezone.now())
+        self.assertIn('ValueError', task_row.last_error)
+        self.assertFalse(tasks.run_next('test'))
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_next('test')
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertEqual(CALLS, ['boom', 'boom'])
+
+    def test_same_key_enqueued_once(self):
+        """Задача с тем же ключом не дублируется, пока ждёт выполнения."""
+        succeeding.delay(1, key='one')
+        succeeding.delay(1, key='one')
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failed_key_not_enqueued_again(self):
+        """Ключ упавшей задачи не ставится в очередь повторно."""
+        succeeding.delay(1, key='failed')
+        Task.objects.update(status=Task.FAILED)
+        self.assertIsNone(succeeding.delay(1, key='failed'))
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failed_key_not_enqueued_again_in_bulk(self):
+        """Пакетная постановка пропускает ключи упавших задач."""
+        succeeding.delay(1, key='failed')
+        Task.objects.update(status=Task.FAILED)
+        created = succeeding.delay_many({'failed': [1], 'new': [2]})
+        self.assertEqual([task_row.key for task_row in created], ['new'])
+        self.assertEqual(Task.objects.count(), 2)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTaskTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_post_image_thumbnails_built_by_worker(self):
+        """Миниатюры нового поста создаёт обработчик очереди."""
+        cache.clear()
+        post = Post.objects.create(
+            author=User.objects.create_user(username='auth'),
+            text='Пост',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+        self.assertEqual(thumbnails.resolve([post]), {})
+        tasks.work(once=True)
+        self.assertIn(post.pk, thumbnails.resolve([post]))
+        self.assertFalse(Task.objects.exists())
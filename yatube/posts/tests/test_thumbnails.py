@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPrefetchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}',
+                image=SimpleUploadedFile(f'small{number}.gif', SMALL_GIF,
+                                         content_type='image/gif'))
+            for number in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_thumbnails_not_generated_in_request(self):
+        """Отсутствующая миниатюра не создаётся в запросе, и запрос
+        ничего не пишет в очередь."""
+        tasks = Task.objects.count()
+        with mock.patch.object(thumbnails, 'render_thumbnails') as render:
+            self.assertEqual(thumbnails.resolve(self.posts), {})
+        render.assert_not_called()
+        self.assertEqual(Task.objects.count(), tasks)
+
+    def test_ready_thumbnails_read_in_bulk(self):
+        """Готовые миниатюры всей страницы читаются одним запросом."""
+        for post in self.posts:
+            name = post.image.name
+            thumbnails.store(name, *thumbnails.render_thumbnails(name))
+        cache.clear()
+        with self.assertNumQueries(1):
+            ready = thumbnails.resolve(self.posts)
+        self.assertEqual(set(ready), {post.pk for post in self.posts})
+        with self.assertNumQueries(0):
+            thumbnails.resolve(self.posts)
+
+    def test_variants_in_all_widths_and_formats(self):
+        """Для картинки создаются все ширины в JPEG и WebP, а страница
+        получает их в srcset."""
+        post = self.posts[0]
+        name = post.image.name
+        thumbnails.store(name, *thumbnails.render_thumbnails(name))
+        variants = thumbnails.resolve([post])[post.pk]
+        self.assertEqual(variants.width, 960)
+        self.assertIn('320w', variants.default_srcset)
+        self.assertTrue(variants.default.url.endswith('.jpg'))
+        (mime, srcset), = variants.sources
+        self.assertEqual(mime, 'image/webp')
+        self.assertEqual(srcset.count('.webp'), 3)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, 'type="image/webp"')
+
+    def test_saving_post_with_image_enqueues_thumbnails(self):
+        """Миниатюры ставятся в очередь сразу после сохранения поста."""
+        post = self.posts[0]
+        with mock.patch.object(thumbnails, 'enqueue') as enqueue:
+            post.save()
+        enqueue.assert_called_once_with(post.image.name)
+
+    def test_generate_thumbnails_command(self):
+        """Команда создаёт миниатюры всех картинок постов."""
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        cache.clear()
+        ready = thumbnails.resolve(self.posts)
+        self.assertEqual(set(ready), {post.pk for post in self.posts})
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import TieredCache
+
+
+def set_in_other_process(location, key, value):
+    TieredCache(location, {}).set(key, value)
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.location = os.path.join(directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return TieredCache(self.location, {'OPTIONS': options})
+
+    def test_read_served_from_local_tier(self):
+        """Прочитанное значение повторно берётся из памяти процесса."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get_many(['key', 'missing']),
+                         {'key': 'value'})
+        stats = self.cache.hit_ratios()
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertEqual(stats['local_hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_local_tier_is_bounded(self):
+        """Вытесненное из памяти значение читается из общего уровня."""
+        cache = self.make_cache(LOCAL_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+            cache.get(key)
+        self.assertEqual(len(cache._tier.entries), 2)
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.hit_ratios()['shared_hits'], 4)
+
+    def test_changes_from_other_process_are_visible(self):
+        """Изменение в другом процессе сбрасывает локальную копию."""
+        self.cache.set('key', 'old')
+        self.assertEqual(self.cache.get('key'), 'old')
+        process = multiprocessing.Process(
+            target=set_in_other_process, args=(self.location, 'key', 'new'))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_write_during_read_keeps_new_value(self):
+        """Значение, прочитанное до записи другим потоком, не остаётся
+        в памяти вместо записанного."""
+        self.cache.set('counter', 1, timeout=None)
+        self.cache._tier.entries.clear()
+        read = self.cache.shared._get_entries
+
+        def read_then_incr(keys):
+            entries = read(keys)
+            self.cache.incr('counter')
+            return entries
+
+        with mock.patch.object(self.cache.shared, '_get_entries',
+                               side_effect=read_then_incr):
+            self.assertEqual(self.cache.get('counter'), 1)
+        self.assertEqual(self.cache.get('counter'), 2)
+        self.assertEqual(self.cache.get('counter'), 2)
+
+    def test_add_incr_delete(self):
+        """add не перезаписывает ключ, incr и delete меняют оба уровня."""
+        self.assertTrue(self.cache.add('counter', 1, timeout=None))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(self.cache.shared.get('counter'), 2)
+        self.cache.delete('counter')
+        self.assertIsNone(self.cache.get('counter'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter')
+
+    def test_culled_key_dropped_from_local_tier(self):
+        """Ключ, вытесненный из общего уровня при переполнении, не
+        остаётся в памяти процесса."""
+        cache = self.make_cache(MAX_ENTRIES=2, CULL_FREQUENCY=3)
+        cache.set('a', 'a')
+        self.assertEqual(cache.get('a'), 'a')
+        cache.set('b', 'b')
+        with mock.patch('core.cache_backends.random.randrange',
+                        return_value=0):
+            cache.add('c', 'c')
+        self.assertIsNone(cache.shared.get('a'))
+        self.assertIsNone(cache.get('a'))
+
+    def test_add_recorded_in_invalidations(self):
+        """Успешный add попадает в журнал изменений, неудачный — нет."""
+        last = self.cache.shared.last_invalidation()
+        self.assertTrue(self.cache.add('key', 'value'))
+        after_add = self.cache.shared.last_invalidation()
+        self.assertGreater(after_add, last)
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertEqual(self.cache.shared.last_invalidation(), after_add)
+
+    def test_expired_values_are_not_returned(self):
+        """Истёкшее значение не возвращается и не мешает add."""
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'fresh'))
+
+    def test_each_get_returns_a_copy(self):
+        """Изменение прочитанного объекта не меняет значение в кеше."""
+        self.cache.set('key', {'a': 1})
+        self.cache.get('key')['a'] = 2
+        self.assertEqual(self.cache.get('key'), {'a': 1})
@@ -0,0 +1,63 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def timing(self, response):
+        header = response['Server-Timing']
+        return {
+            'queries': int(re.search(r'"(\d+) queries"', header)[1]),
+            'template': float(re.search(r'tpl;dur=([\d.]+)', header)[1]),
+            'hits': int(re.search(r'hits=(\d+)', header)[1]),
+            'misses': int(re.search(r'misses=(\d+)', header)[1]),
+        }
+
+    def test_header_reports_queries_templates_and_cache(self):
+        """Server-Timing показывает запросы, шаблоны и кеш."""
+        first = self.timing(self.client.get(reverse('posts:index')))
+        self.assertGreater(first['queries'], 0)
+        self.assertGreater(first['template'], 0)
+        self.assertGreater(first['misses'], 0)
+        second = self.timing(self.client.get(reverse('posts:index')))
+        self.assertGreater(second['hits'], 0)
+        self.assertEqual(second['template'], 0)
+
+    def test_metrics_logged(self):
+        """Метрики запроса пишутся в лог yatube.timing."""
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('path=/ status=200', logs.output[0])
+        self.assertIn('queries=', logs.output[0])
+
+    def test_header_only_for_staff(self):
+        """Без DEBUG заголовок получают только сотрудники, а метрики
+        пишутся в лог для всех."""
+        self.client.force_login(self.author)
+        with self.assertLogs('yatube.timing', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.client.logout()
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled_by_setting(self):
+        """Настройка SERVER_TIMING отключает заголовок."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+        cls.created = timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5))
+        Post.objects.filter(pk=cls.post.pk).update(created=cls.created)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self, **options):
+        output = StringIO()
+        call_command('export_data', stdout=output, stderr=StringIO(),
+                     **options)
+        return output.getvalue()
+
+    def import_file(self, content, suffix='.ndjson', **options):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(content)
+        call_command('import_data', path, stdout=StringIO(), **options)
+
+    def test_export_writes_one_record_per_line(self):
+        """Экспорт — по записи на строку в порядке зависимостей."""
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['user', 'user', 'group', 'post', 'comment', 'follow']
+        )
+        post = records[3]
+        self.assertEqual(post['author'], 'auth')
+        self.assertEqual(post['group'], 'group')
+
+    def test_round_trip_preserves_data(self):
+        """Выгрузка, загруженная в пустую базу, восстанавливает данные
+        вместе с id и датами."""
+        dump = self.export()
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        self.import_file(dump, batch_size=1)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, 'Тестовый пост')
+        self.assertEqual(post.author.username, 'auth')
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.created, self.created)
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        self.assertTrue(Follow.objects.filter(
+            user__username='reader', author__username='auth').exists())
+        author = User.objects.get(username='auth')
+        self.assertEqual(author.stats.posts_count, 1)
+
+    def test_import_csv(self):
+        """CSV загружается по одному виду записей на файл."""
+        self.import_file(
+            'author,group,text\nauth,group,Из CSV\nreader,,Без группы\n',
+            suffix='.csv', type='post'
+        )
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 2)
+        self.assertTrue(Post.objects.filter(
+            author=self.reader, group=None, text='Без группы').exists())
+
+    def test_import_invalidates_cached_pages(self):
+        """Загруженные посты и комментарии сразу видны на страницах,
+        закешированных до загрузки."""
+        cache.clear()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=('group',)),
+            reverse('posts:profile', args=('auth',)),
+        )
+        for url in urls:
+            self.client.get(url)
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(detail)
+        self.import_file('\n'.join(json.dumps(record) for record in (
+            {'type': 'post', 'author': 'auth', 'group': 'group',
+             'text': 'Загруженный пост'},
+            {'type': 'comment', 'post': self.post.pk, 'author': 'auth',
+             'text': 'Загруженный комментарий'},
+        )))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Загруженный пост')
+        self.assertContains(self.client.get(detail),
+                            'Загруженный комментарий')
+
+    def test_unknown_author_is_reported(self):
+        """Ссылка на несуществующего автора — понятная ошибка."""
+        with self.assertRaisesMessage(CommandError, 'nobody'):
+            self.import_file(json.dumps(
+                {'type': 'post', 'author': 'nobody', 'text': 'Текст'}))
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_malformed_records_are_reported(self):
+        """Запись без поля или со ссылкой на несуществующий объект —
+        ошибка команды с номером записи, а не KeyError или
+        IntegrityError."""
+        cases = (
+            ([{'type': 'post', 'author': 'auth'}], 'Запись 1 (post)'),
+            ([{'text': 'Без вида'}], 'Запись 1'),
+            ([{'type': 'user', 'username': 'new'},
+              {'type': 'post', 'author': 'nobody', 'text': 'Текст'}],
+             'Запись 2 (post)'),
+            ([{'type': 'comment', 'post': 10 ** 6, 'author': 'auth',
+               'text': 'Текст'}], 'Запись 1 (comment)'),
+            ([{'type': 'comment', 'post': 'x', 'author': 'auth',
+               'text': 'Текст'}], 'Запись 1 (comment)'),
+            ([{'type': 'user', 'username': 'auth'}], 'Записи 1–1 (user)'),
+        )
+        for records, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(CommandError, message):
+                    self.import_file('\n'.join(map(json.dumps, records)))
+        self.assertEqual(Comment.objects.count(), 1)
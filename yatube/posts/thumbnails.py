@@ -0,0 +1,257 @@
+"""Миниатюры картинок постов без генерации внутри запроса.
+
+Шаблонный тег ``{% thumbnail %}`` ищет каждую миниатюру в key-value
+хранилище sorl-thumbnail отдельно и, если её нет, декодирует и сжимает
+картинку прямо в запросе. Здесь миниатюры всех постов страницы читаются
+из хранилища одним запросом; пока миниатюр нет, показывается исходная
+картинка. Страницы ничего не пишут: генерацию ставит в очередь
+сохранение поста.
+
+Миниатюры создаются сразу после сохранения поста фоновой задачей
+(core.tasks), которую выполняет ``manage.py worker``; пакетная
+генерация для уже загруженных картинок — ``manage.py
+generate_thumbnails``.
+
+Для каждой картинки создаётся набор вариантов: несколько ширин с
+одинаковыми пропорциями в JPEG и WebP, чтобы браузер по ``srcset``
+загружал наименьший подходящий файл.
+"""
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.tasks import task
+from posts.constants import (THUMBNAIL_FORMATS, THUMBNAIL_GEOMETRY,
+                             THUMBNAIL_OPTIONS, THUMBNAIL_SIZES,
+                             THUMBNAIL_WIDTHS)
+
+from . import cache_scopes
+from .models import Post
+
+
+def _geometry(width):
+    """Геометрия ширины ``width`` с пропорциями THUMBNAIL_GEOMETRY."""
+    full_width, full_height = map(int, THUMBNAIL_GEOMETRY.split('x'))
+    return f'{width}x{round(width * full_height / full_width)}'
+
+
+# Все варианты миниатюр, которые используются в шаблонах.
+THUMBNAIL_SPECS = tuple(
+    (_geometry(width), {**THUMBNAIL_OPTIONS, 'format': image_format})
+    for image_format in THUMBNAIL_FORMATS
+    for width in THUMBNAIL_WIDTHS
+)
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def _full_options(source, options):
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(source, geometry=THUMBNAIL_GEOMETRY,
+                   options=THUMBNAIL_OPTIONS):
+    """Файл миниатюры с тем же именем, что выбрал бы get_thumbnail."""
+    options = _full_options(source, options)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def _read_kvstore(raw_keys):
+    """Значения хранилища sorl-thumbnail для набора ключей за раз."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, KVStore):
+        return {key: kvstore._get_raw(key) for key in raw_keys}
+    found = kvstore.cache.get_many(raw_keys)
+    missing = [key for key in raw_keys if key not in found]
+    if missing:
+        from_db = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(
+            from_db, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(from_db)
+    return found
+
+
+def _ready(raw_keys):
+    values = _read_kvstore(raw_keys)
+    return {
+        key: deserialize_image_file(values[key]) for key in raw_keys
+        if isinstance(values.get(key), str) and values[key]
+    }
+
+
+class Variants:
+    """Готовые варианты миниатюры одной картинки.
+
+    ``url``, ``width`` и ``height`` относятся к самому большому варианту
+    в первом формате из THUMBNAIL_FORMATS (он же ``src`` в шаблоне).
+    """
+
+    sizes = THUMBNAIL_SIZES
+
+    def __init__(self, files):
+        self.files = files
+
+    def srcset(self, image_format):
+        return ', '.join(
+            f'{image.url} {image.width}w'
+            for (spec_format, _), image in self.files.items()
+            if spec_format == image_format
+        )
+
+    @property
+    def default(self):
+        return self.files[THUMBNAIL_FORMATS[0], max(THUMBNAIL_WIDTHS)]
+
+    @property
+    def url(self):
+        return self.default.url
+
+    @property
+    def width(self):
+        return self.default.width
+
+    @property
+    def height(self):
+        return self.default.height
+
+    @property
+    def sources(self):
+        """Пары (MIME-тип, srcset) для тегов <source> в <picture>."""
+        return [
+            (f'image/{image_format.lower()}', self.srcset(image_format))
+            for image_format in THUMBNAIL_FORMATS[1:]
+        ]
+
+    @property
+    def default_srcset(self):
+        return self.srcset(THUMBNAIL_FORMATS[0])
+
+
+def _variant_keys(image):
+    source = ImageFile(image)
+    return {
+        (options['format'], int(geometry.split('x')[0])):
+            add_prefix(thumbnail_file(source, geometry, options).key)
+        for geometry, options in THUMBNAIL_SPECS
+    }
+
+
+def resolve(posts):
+    """Готовые миниатюры постов: {pk: Variants}.
+
+    Ключи всех вариантов всех постов читаются из хранилища за раз. Посты,
+    у которых готовы не все варианты, в результат не попадают.
+    """
+    variant_keys = {
+        post.pk: _variant_keys(post.image) for post in posts if post.image
+    }
+    ready = _ready([
+        key for keys in variant_keys.values() for key in keys.values()
+    ])
+    thumbnails = {}
+    for post in posts:
+        if not post.image:
+            continue
+        keys = variant_keys[post.pk]
+        if all(key in ready for key in keys.values()):
+            thumbnails[post.pk] = Variants({
+                variant: ready[key] for variant, key in keys.items()
+            })
+    return thumbnails
+
+
+def render_thumbnails(name, specs=THUMBNAIL_SPECS):
+    """Создаёт файлы миниатюр картинки без обращений к базе.
+
+    Возвращает размер исходной картинки и список пар
+    (имя миниатюры, её размер).
+    """
+    engine = default.engine
+    source = ImageFile(name, image_storage())
+    source_image = engine.get_image(source)
+    try:
+        source_size = engine.get_image_size(source_image)
+        results = []
+        for geometry_string, options in specs:
+            thumbnail = thumbnail_file(source, geometry_string, options)
+            if thumbnail.exists():
+                image = engine.get_image(thumbnail)
+            else:
+                options = _full_options(source, options)
+                options['image_info'] = engine.get_image_info(source_image)
+                ratio = engine.get_image_ratio(source_image, options)
+                geometry = parse_geometry(geometry_string, ratio)
+                image = engine.create(source_image, geometry, options)
+                engine.write(image, options, thumbnail)
+            results.append((thumbnail.name, engine.get_image_size(image)))
+        return source_size, results
+    finally:
+        engine.cleanup(source_image)
+
+
+def render_safely(name):
+    """render_thumbnails для пакетной обработки: ошибка одной картинки
+    возвращается вместе с именем, а не прерывает остальные."""
+    try:
+        return name, render_thumbnails(name), None
+    except Exception as error:
+        return name, None, repr(error)
+
+
+def store(name, source_size, results):
+    """Записывает созданные миниатюры в key-value хранилище."""
+    source = ImageFile(name, image_storage())
+    source.set_size(source_size)
+    default.kvstore.get_or_set(source)
+    for thumbnail_name, size in results:
+        thumbnail = ImageFile(thumbnail_name, default.storage)
+        thumbnail.set_size(size)
+        default.kvstore.set(thumbnail, source)
+
+
+def is_ready(name, specs=THUMBNAIL_SPECS):
+    source = ImageFile(name, image_storage())
+    raw_keys = [
+        add_prefix(thumbnail_file(source, geometry, options).key)
+        for geometry, options in specs
+    ]
+    return len(_ready(raw_keys)) == len(raw_keys)
+
+
+@task(max_attempts=3)
+def generate(name):
+    """Создаёт миниатюры картинки и сбрасывает кеш страниц её постов."""
+    if is_ready(name):
+        return
+    store(name, *render_thumbnails(name))
+    for post in Post.objects.filter(image=name).select_related(
+            'author', 'group'):
+        cache_scopes.post_changed(post)
+
+
+def _task_key(name):
+    return f'thumbnails:{name}'
+
+
+def enqueue(name):
+    """Ставит генерацию миниатюр в очередь фоновых задач."""
+    generate.delay(name, key=_task_key(name))
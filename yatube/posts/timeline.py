@@ -0,0 +1,103 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Каждый новый пост раскладывается в ленты подписчиков автора, поэтому
+страница `follow_index` читает готовые записи по индексу (user, created)
+вместо соединения Follow и Post. Для пользователей, чья лента ещё не
+построена, используется прежний запрос.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from posts.constants import TIMELINE_BATCH_SIZE
+
+from .models import Follow, Post, Timeline, TimelineEntry
+
+ORDERING = ('-feed_created', '-feed_post')
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=TIMELINE_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def _author_entries(user_id, author_ids):
+    posts = Post.objects.filter(author_id__in=author_ids).values_list(
+        'id', 'author_id', 'created'
+    ).order_by()
+    batch = []
+    for post_id, author_id, created in posts.iterator(
+            chunk_size=TIMELINE_BATCH_SIZE):
+        batch.append(TimelineEntry(user_id=user_id, post_id=post_id,
+                                   author_id=author_id, created=created))
+        if len(batch) >= TIMELINE_BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def is_built(user):
+    return Timeline.objects.filter(user=user).exists()
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в построенные ленты подписчиков автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id, user__timeline__isnull=False
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      author_id=post.author_id, created=post.created)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def add_author(user_id, author_id):
+    """Добавляет в ленту все посты автора после подписки."""
+    if Timeline.objects.filter(user_id=user_id).exists():
+        _author_entries(user_id, [author_id])
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def create_empty(user):
+    """Лента нового пользователя без подписок построена сразу."""
+    Timeline.objects.get_or_create(user=user)
+
+
+@transaction.atomic
+def rebuild(user):
+    """Строит ленту пользователя заново по его подпискам."""
+    TimelineEntry.objects.filter(user=user).delete()
+    author_ids = list(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+    if author_ids:
+        _author_entries(user.pk, author_ids)
+    Timeline.objects.update_or_create(user=user)
+
+
+def timeline_posts(user):
+    """Посты ленты подписок: из материализованной ленты, если она
+    построена, иначе прямым запросом по подпискам.
+
+    Оба запроса сортируются по ORDERING, который совпадает с индексом
+    (user, created, post) ленты.
+    """
+    if is_built(user):
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_created=F('timeline_entries__created'),
+            feed_post=F('timeline_entries__post'),
+        )
+    else:
+        posts = Post.objects.filter(author__following__user=user).annotate(
+            feed_created=F('created'),
+            feed_post=F('pk'),
+        )
+    return posts.select_related('group').order_by(*ORDERING)
@@ -0,0 +1,350 @@
+"""Перенос пользователей, групп, постов, комментариев и подписок.
+
+Экспорт — поток NDJSON: одна запись на строку, поле ``type`` задаёт
+вид записи, записи идут в порядке зависимостей (пользователи и группы
+раньше постов). Пользователи и группы ссылаются друг на друга по
+username и slug, посты и комментарии сохраняют свои id.
+
+Импорт читает те же записи из NDJSON или CSV (один файл на вид записи)
+и сохраняет их через bulk_create порциями, каждая порция — отдельная
+транзакция. Запись без обязательного поля или со ссылкой на
+несуществующий объект останавливает импорт с ошибкой, в которой указан
+её номер. Даты создания берутся из записей. bulk_create не вызывает
+сигналов, поэтому области кеша страниц, которые затрагивают записи,
+собираются отдельно (``affected_scopes``) и сбрасываются командой после
+перестройки производных данных.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache_scopes
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TYPES = ('user', 'group', 'post', 'comment', 'follow')
+EXPORT_FIELDS = {
+    'user': (User, {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+        'password': 'password',
+        'is_active': 'is_active',
+        'date_joined': 'date_joined',
+    }),
+    'group': (Group, {
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    }),
+    'post': (Post, {
+        'id': 'pk',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'created': 'created',
+        'image': 'image',
+    }),
+    'comment': (Comment, {
+        'id': 'pk',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }),
+    'follow': (Follow, {
+        'user': 'user__username',
+        'author': 'author__username',
+    }),
+}
+
+
+class TransferError(Exception):
+    pass
+
+
+def export_records(types=TYPES, chunk_size=2000):
+    """Записи для экспорта; в памяти одновременно не больше
+    ``chunk_size`` строк."""
+    for kind in types:
+        model, fields = EXPORT_FIELDS[kind]
+        rows = model.objects.order_by('pk').values_list(*fields.values())
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield {'type': kind, **dict(zip(fields, row))}
+
+
+def to_ndjson(record):
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise TransferError(f'Строка {number}: {error}')
+        if not isinstance(record, dict):
+            raise TransferError(f'Строка {number}: запись — не объект')
+        yield record
+
+
+def read_csv(lines, kind):
+    for row in csv.DictReader(lines):
+        yield {'type': kind, **row}
+
+
+def _datetime(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise TransferError(f'Неверная дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+# Поля, без которых запись не загрузить.
+REQUIRED_FIELDS = {
+    'user': ('username',),
+    'group': ('slug', 'title'),
+    'post': ('author', 'text'),
+    'comment': ('post', 'author', 'text'),
+    'follow': ('user', 'author'),
+}
+
+
+@contextmanager
+def _record(kind, number):
+    """Добавляет к ошибке номер и вид записи."""
+    try:
+        yield
+    except TransferError as error:
+        raise TransferError(f'Запись {number} ({kind}): {error}')
+
+
+def _check(kind, number, record):
+    missing = [field for field in REQUIRED_FIELDS[kind]
+               if record.get(field) in (None, '')]
+    if missing:
+        raise TransferError(
+            f'Запись {number} ({kind}): нет полей {", ".join(missing)}')
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise TransferError(f'Неверный id: {value}')
+
+
+def _ids(model, field, values):
+    """{значение поля: pk} для существующих объектов."""
+    values = {value for value in values if value}
+    return dict(model.objects.filter(**{f'{field}__in': values})
+                .values_list(field, 'pk'))
+
+
+def _ref(found, model, value):
+    if value not in found:
+        raise TransferError(
+            f'не найден {str(model._meta.verbose_name).lower()}: {value}')
+    return found[value]
+
+
+def build_user(batch):
+    users = []
+    for number, record in batch:
+        with _record('user', number):
+            users.append(User(
+                username=record['username'],
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                email=record.get('email') or '',
+                password=record.get('password') or '!',
+                is_active=_bool(record.get('is_active', True)),
+                date_joined=_datetime(record.get('date_joined')),
+            ))
+    return users
+
+
+def build_group(batch):
+    return [
+        Group(slug=record['slug'], title=record['title'],
+              description=record.get('description') or '')
+        for _, record in batch
+    ]
+
+
+def build_post(batch):
+    authors = _ids(User, 'username',
+                   (record['author'] for _, record in batch))
+    groups = _ids(Group, 'slug', (record.get('group') for _, record in batch))
+    posts = []
+    for number, record in batch:
+        with _record('post', number):
+            created = _datetime(record.get('created'))
+            group = record.get('group')
+            posts.append(Post(
+                pk=_int(record['id']) if record.get('id') else None,
+                author_id=_ref(authors, User, record['author']),
+                group_id=_ref(groups, Group, group) if group else None,
+                text=record['text'],
+                image=record.get('image') or '',
+                created=created,
+                updated=created,
+            ))
+    return posts
+
+
+def build_comment(batch):
+    authors = _ids(User, 'username',
+                   (record['author'] for _, record in batch))
+    comments = []
+    for number, record in batch:
+        with _record('comment', number):
+            comments.append(Comment(
+                pk=_int(record['id']) if record.get('id') else None,
+                post_id=_int(record['post']),
+                author_id=_ref(authors, User, record['author']),
+                text=record['text'],
+                created=_datetime(record.get('created')),
+            ))
+    posts = _ids(Post, 'pk', (comment.post_id for comment in comments))
+    for (number, _), comment in zip(batch, comments):
+        with _record('comment', number):
+            _ref(posts, Post, comment.post_id)
+    return comments
+
+
+def build_follow(batch):
+    users = _ids(User, 'username', (
+        record[field] for _, record in batch for field in ('user', 'author')
+    ))
+    follows = []
+    for number, record in batch:
+        with _record('follow', number):
+            follows.append(Follow(
+                user_id=_ref(users, User, record['user']),
+                author_id=_ref(users, User, record['author']),
+            ))
+    return follows
+
+
+BUILDERS = {
+    'user': build_user,
+    'group': build_group,
+    'post': build_post,
+    'comment': build_comment,
+    'follow': build_follow,
+}
+
+
+def affected_scopes(kind, records):
+    """Области кеша страниц, на которых появятся записи. Новые
+    пользователи и группы не затрагивают уже закешированных страниц."""
+    if kind == 'post':
+        scopes = {cache_scopes.ALL_POSTS}
+        for record in records:
+            scopes.add(cache_scopes.author_scope(record['author']))
+            if record.get('group'):
+                scopes.add(cache_scopes.group_scope(record['group']))
+        return scopes
+    if kind == 'comment':
+        return {cache_scopes.post_scope(record['post'])
+                for record in records}
+    if kind == 'follow':
+        return {cache_scopes.author_scope(record[field])
+                for record in records for field in ('user', 'author')}
+    return set()
+
+
+@contextmanager
+def explicit_dates():
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из записей."""
+    fields = [
+        Post._meta.get_field('created'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def _batches(records, batch_size):
+    """Порции пар (номер записи, запись) одного вида подряд, не больше
+    batch_size. Записи без обязательных полей вызывают TransferError."""
+    numbered = enumerate(records, start=1)
+    for kind, group in groupby(numbered,
+                               key=lambda item: item[1].get('type')):
+        batch = []
+        for number, record in group:
+            if kind not in BUILDERS:
+                raise TransferError(
+                    f'Запись {number}: неизвестный вид записи {kind}')
+            _check(kind, number, record)
+            batch.append((number, record))
+            if len(batch) == batch_size:
+                yield kind, batch
+                batch = []
+        if batch:
+            yield kind, batch
+
+
+def import_records(records, batch_size=1000, scopes=None):
+    """Сохраняет записи, возвращает {вид: сколько записей обработано}.
+
+    Если передано множество ``scopes``, в него добавляются области кеша,
+    затронутые записями. Ошибка в записи вызывает TransferError с её
+    номером; порции до неё уже сохранены.
+    """
+    totals = dict.fromkeys(TYPES, 0)
+    with explicit_dates():
+        for kind, batch in _batches(records, batch_size):
+            try:
+                with transaction.atomic():
+                    EXPORT_FIELDS[kind][0].objects.bulk_create(
+                        BUILDERS[kind](batch),
+                        ignore_conflicts=kind == 'follow',
+                    )
+            except IntegrityError as error:
+                raise TransferError(
+                    f'Записи {batch[0][0]}–{batch[-1][0]} ({kind}): {error}')
+            totals[kind] += len(batch)
+            if scopes is not None:
+                scopes.update(
+                    affected_scopes(kind, [record for _, record in batch]))
+    # id постов и комментариев заданы явно: счётчики последовательностей
+    # (там, где они есть) нужно сдвинуть за максимальный id.
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Post, Comment])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return totals
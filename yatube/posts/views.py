@@ -1,9 +1,14 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.paginator import EmptyPage
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.budget import query_budget
+from core.cache import versioned_cache_page
+from core.paginator import CursorPaginator
+
+from . import cache_scopes, counters, search, thumbnails, timeline
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
 from posts.constants import CACHE_TTL, POST_OBJ
@@ -11,45 +16,71 @@ from posts.constants import CACHE_TTL, POST_OBJ
 User = get_user_model()
 
 
-def paginate_posts(request, post_list):
-    paginator = Paginator(post_list, POST_OBJ)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def paginate_posts(request, post_list, ordering=None):
+    paginator = CursorPaginator(post_list, POST_OBJ, ordering=ordering)
+    try:
+        page_obj = paginator.get_page(
+            number=request.GET.get('page'),
+            cursor=request.GET.get('cursor'),
+        )
+    except EmptyPage:
+        raise Http404
     return page_obj
 
 
-@cache_page(CACHE_TTL, key_prefix='index_view')
+@query_budget(7)
+@versioned_cache_page(CACHE_TTL, cache_scopes.index_scopes)
 def index(request):
-    posts = Post.objects.select_related('group')[:POST_OBJ]
-    post_list = Post.objects.all()
+    post_list = Post.objects.select_related('author', 'group')
     page_obj = paginate_posts(request, post_list)
     context = {
         'page_obj': page_obj,
-        'posts': posts,
+        'posts': page_obj.object_list,
         'title': 'Это главная страница проекта Yatube'
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(8)
+@versioned_cache_page(CACHE_TTL, cache_scopes.search_scopes)
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    paginator = search.SearchPaginator(
+        query, Post.objects.select_related('author', 'group'), POST_OBJ
+    )
+    page_obj = paginator.get_page(cursor=request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+        'posts': page_obj.object_list,
+        'query': query,
+        'title': f'Поиск: {query}' if query else 'Поиск',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@query_budget(8)
+@versioned_cache_page(CACHE_TTL, cache_scopes.group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.group.all()[:POST_OBJ]
-    post_list = Post.objects.all()
+    post_list = group.group.select_related('author', 'group')
     page_obj = paginate_posts(request, post_list)
     context = {
         'page_obj': page_obj,
         'group': group,
-        'posts': posts,
+        'posts': page_obj.object_list,
         'title': group.title
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(9)
+@versioned_cache_page(CACHE_TTL, cache_scopes.profile_scopes)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
+    user = get_object_or_404(User.objects.select_related('stats'),
+                             username=username)
+    stats = counters.get_stats(user)
+    post_list = user.posts.select_related('author', 'group')
     page_obj = paginate_posts(request, post_list)
-    total_posts = post_list.count()
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(user=request.user,
@@ -57,28 +88,34 @@ def profile(request, username):
     context = {
         'author': user,
         'page_obj': page_obj,
-        'total_posts': total_posts,
+        'total_posts': stats.posts_count,
+        'stats': stats,
         'title': f'Профайл пользователя {username}',
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(8)
+@versioned_cache_page(CACHE_TTL, cache_scopes.post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    author_posts = Post.objects.filter(author=post.author)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    comments = post.comments.select_related('author')
     form = CommentForm()
     context = {
         'post': post,
-        'total_posts': author_posts.count(),
+        'total_posts': counters.get_stats(post.author).posts_count,
         'title': f'Пост: {post.text[:30]}',
         'form': form,
         'comments': comments,
+        'thumbnail': thumbnails.resolve([post]).get(post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(15)
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -91,10 +128,11 @@ def post_create(request):
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@query_budget(15)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id=post.id)
     form = PostForm(
         request.POST or None,
@@ -114,6 +152,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(6)
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -126,12 +165,12 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(8)
 @login_required
 def follow_index(request):
     user = request.user
-    posts = Post.objects.filter(author__following__user=user).select_related(
-        'group')
-    page_obj = paginate_posts(request, posts)
+    posts = timeline.timeline_posts(user).select_related('author')
+    page_obj = paginate_posts(request, posts, ordering=timeline.ORDERING)
     context = {
         'page_obj': page_obj,
         'title': 'Новые записи от авторов, на которых вы подписаны'
@@ -139,6 +178,7 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(11)
 @login_required
 def profile_follow(request, username):
     user = request.user
@@ -149,6 +189,7 @@ def profile_follow(request, username):
     return redirect('posts:profile', username=username)
 
 
+@query_budget(11)
 @login_required
 def profile_unfollow(request, username):
     user = request.user
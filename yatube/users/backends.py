@@ -0,0 +1,33 @@
+"""Бэкенд аутентификации, кеширующий пользователя сессии.
+
+``AuthenticationMiddleware`` загружает пользователя на каждом запросе;
+здесь он берётся из кеша по id и удаляется из него при любом
+сохранении или удалении пользователя (users.signals). Изменения через
+``QuerySet.update()`` сигналов не вызывают — после них нужно вызвать
+``forget_user``.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_KEY = 'auth-user:{}'
+USER_TTL = 60 * 60
+
+User = get_user_model()
+
+
+def forget_user(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, USER_TTL)
+        return user if self.user_can_authenticate(user) else None
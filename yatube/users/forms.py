@@ -1,10 +1,33 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from . import tasks
 
 User = get_user_model()
+# Ключи контекста письма, которые не сохраняются в очереди задач.
+SECRET_CONTEXT = ('user', 'uid', 'token')
 
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется фоновой задачей. В задачу
+    попадают только id пользователя и контекст без токена: токен и
+    письмо создаёт обработчик."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        user = context['user']
+        context = {
+            name: value for name, value in context.items()
+            if name not in SECRET_CONTEXT
+        }
+        tasks.send_password_reset.delay(
+            user.pk, subject_template_name, email_template_name, context,
+            from_email, to_email, html_email_template_name,
+        )
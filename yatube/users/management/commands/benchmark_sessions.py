@@ -0,0 +1,94 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.management.commands.benchmark import percentile
+
+User = get_user_model()
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+PROFILES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [MODEL_BACKEND],
+    },
+    'cached_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': [MODEL_BACKEND],
+    },
+    'cached_db+cached_user': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержку и число запросов к БД для авторизованного '
+            'пользователя с разными бэкендами сессий и загрузки пользователя')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='Адрес для замеров (по умолчанию лента подписок)'
+        )
+        parser.add_argument(
+            '--username', help='Пользователь (по умолчанию первый активный)'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько замеров на профиль'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Сколько запросов сделать до замеров'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by('pk')
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Нет подходящего пользователя')
+        url = options['url'] or reverse('posts:follow_index')
+        results = {}
+        for name, profile in PROFILES.items():
+            with override_settings(**profile):
+                results[name] = self.measure(user, url, options)
+            self.stderr.write(
+                f'{name}: p50={results[name]["p50_ms"]} мс, '
+                f'запросов={results[name]["queries_p50"]}'
+            )
+        self.stdout.write(json.dumps({
+            'url': url,
+            'requests': options['requests'],
+            'results': results,
+        }, ensure_ascii=False, indent=2))
+
+    def measure(self, user, url, options):
+        client = Client()
+        client.force_login(user)
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings = []
+        queries = []
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+        client.logout()
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries_p50': percentile(queries, 50),
+        }
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import forget_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Повторно после коммита: параллельный запрос мог успеть положить
+    # в кеш ещё не изменённую строку.
+    forget_user(instance.pk)
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -0,0 +1,81 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+
+from .backends import USER_KEY
+
+User = get_user_model()
+
+
+class PasswordResetTest(TestCase):
+    def test_reset_email_sent_by_worker(self):
+        """Письмо сброса пароля отправляет обработчик очереди,
+        а не запрос."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'auth@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 1)
+        tasks.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+
+    def test_queued_reset_has_no_token(self):
+        """В очереди нет токена и текста письма: ссылку со свежим
+        токеном создаёт обработчик."""
+        user = User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'auth@example.com'}
+        )
+        payload = json.loads(Task.objects.get().payload)
+        self.assertEqual(payload['args'][0], user.pk)
+        self.assertNotIn('token', payload['args'][3])
+        self.assertNotIn('reset/', Task.objects.get().payload)
+        tasks.work(once=True)
+        link = re.search(r'https?://\S+/reset/\S+/', mail.outbox[0].body)
+        response = self.client.get(link.group(0), follow=True)
+        self.assertTrue(response.context['validlink'])
+
+
+class CachedSessionUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.client.force_login(self.user)
+
+    def test_session_and_user_read_from_cache(self):
+        """Сессия и пользователь авторизованного запроса берутся из
+        кеша, без запросов к django_session и auth_user."""
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        sql = ' '.join(query['sql'] for query in captured.captured_queries)
+        self.assertNotIn('FROM "django_session"', sql)
+        self.assertNotIn('FROM "auth_user" WHERE', sql)
+
+    def test_user_change_invalidates_cache(self):
+        """Изменение пользователя удаляет его из кеша: отключённый
+        пользователь сразу теряет доступ."""
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        self.assertIsNotNone(cache.get(USER_KEY.format(self.user.pk)))
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(USER_KEY.format(self.user.pk)))
+        self.assertEqual(self.client.get(url).status_code, 302)
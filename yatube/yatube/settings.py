@@ -10,7 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -30,10 +34,42 @@ SECRET_KEY = '-0o+mraaikfx9#y8%4db%el1zs0qsw8y*ke9a#qqw!5(8so&r@'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
-# Подключение бэкенда кеширования
+# Заголовок Server-Timing и лог yatube.timing с метриками запроса.
+# Без DEBUG заголовок получают только сотрудники (is_staff): время
+# запросов к БД и промахи кеша — подсказка для атакующего.
+SERVER_TIMING = DEBUG
+
+# Превышение бюджета запросов (core.budget.query_budget) пишется в лог;
+# в тестах бюджета оно приводит к ошибке.
+QUERY_BUDGET_RAISE = False
+
+# Подключение бэкенда кеширования: небольшой LRU в памяти процесса
+# перед общим для всех процессов кешем в файле SQLite.
+# Файл кеша задаётся переменной окружения CACHE_LOCATION. Тесты
+# (manage.py test и pytest) получают отдельный файл во временном каталоге,
+# чтобы не создавать его в исходниках и не очищать кеш запущенного
+# сервера; дочерние процессы тестов находят его через ту же переменную.
+if (sys.argv[1:2] == ['test'] or 'pytest' in sys.modules) and (
+        'CACHE_LOCATION' not in os.environ):
+    _test_cache_dir = tempfile.mkdtemp(prefix='yatube-cache-')
+    atexit.register(shutil.rmtree, _test_cache_dir, ignore_errors=True)
+    os.environ['CACHE_LOCATION'] = os.path.join(
+        _test_cache_dir, 'cache.sqlite3')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.InstrumentedTieredCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'LOCAL_MAX_ENTRIES': 300,
+            'LOCAL_TIMEOUT': 300,
+            # Сверка памяти процесса с журналом изменений не чаще раза
+            # в секунду: изменение из другого процесса (в том числе
+            # новое поколение страниц) видно в нём с задержкой до 1 с.
+            'SYNC_INTERVAL': 1,
+        },
     }
 }
 
@@ -61,6 +97,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -71,6 +108,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,7 +124,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -110,9 +149,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами, PRAGMA выполняются один раз.
+        'CONN_MAX_AGE': 60,
+    },
+    # Реплика только для чтения; используется, если указана
+    # в DATABASE_REPLICAS. В тестах это та же база, что и default.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+# Чтения в запросах идут на эти базы (core.routers), записи — в default.
+# После записи пользователь читает из default ещё REPLICA_PIN_SECONDS
+# секунд: так он сразу видит свои изменения.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 10
+
+# PRAGMA для каждого нового соединения с SQLite (core.db).
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность при сбое, busy_timeout ждёт блокировку вместо
+# немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Сессии читаются из кеша и пишутся и в кеш, и в базу; пользователь
+# сессии тоже берётся из кеша (users.backends). ModelBackend оставлен
+# для сессий, созданных до включения кеширующего бэкенда.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -154,3 +234,12 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/static/'
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Загрузка файлов прерывается, как только файл превысил
+# FILE_UPLOAD_MAX_SIZE байт: остаток не попадает ни в память, ни на диск.
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]